@@ -0,0 +1,7 @@
+from .embedding_cache import EmbeddingCache
+from .page_cache import PageCache, CachedPage
+from .response_cache import ResponseCache, CachedResponse
+from .seen_urls import SeenUrlIndex
+from .extraction_cache import ExtractionCache, CachedExtraction
+
+__all__ = ["EmbeddingCache", "PageCache", "CachedPage", "ResponseCache", "CachedResponse", "SeenUrlIndex", "ExtractionCache", "CachedExtraction"]
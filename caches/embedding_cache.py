@@ -0,0 +1,130 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from logger import get_logger
+from typing import List, Dict, Optional, Iterable, Tuple
+
+SQLITE_MAX_PARAMS = 500  # Keys per "IN (...)" lookup
+
+
+class EmbeddingCache:
+    """On-disk, content-addressed embedding cache with LRU eviction.
+
+    Entries are keyed by a hash of (model, dimensions, text) and stored as packed
+    float32 blobs in SQLite, so the cache can be shared by every worker process.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.logger = get_logger()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  Embedding cache disabled, could not open {path}: {e}")
+            self._connection = None
+
+    @staticmethod
+    def make_key(model: str, dimensions: int, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{dimensions}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(keys))
+        if self._connection is None:
+            self.misses += len(keys)
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        try:
+            with self._lock:
+                for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                    chunk = keys[start:start + SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._connection.execute(
+                        f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype='<f4').tolist()
+
+                if found:
+                    now = time.time()
+                    self._connection.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  Embedding cache lookup failed: {e}")
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        self.put_many([(key, embedding)])
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        if self._connection is None:
+            return
+
+        now = time.time()
+        rows = [(key, np.asarray(embedding, dtype='<f4').tobytes(), now) for key, embedding in items]
+        if not rows:
+            return
+
+        try:
+            with self._lock:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)", rows
+                )
+                self._evict()
+                self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  Embedding cache write failed: {e}")
+
+    def _evict(self) -> None:
+        count = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.logger.debug(f"🧹  Evicted {overflow} least recently used embeddings from cache")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def stats(self) -> Dict[str, int]:
+        entries = 0
+        if self._connection is not None:
+            try:
+                with self._lock:
+                    entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except Exception:
+                pass
+
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "max_entries": self.max_entries}
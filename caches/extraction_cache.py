@@ -0,0 +1,82 @@
+import datetime
+from typing import Dict, NamedTuple, Optional
+from _types import ExtractedArticleData
+from .response_cache import ResponseCache
+
+
+class CachedExtraction(NamedTuple):
+    article: ExtractedArticleData
+    etag: Optional[str]
+    last_modified: Optional[str]
+    age: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that let the publisher answer 304 Not Modified instead of resending the page"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ExtractionCache:
+    """On-disk cache of extracted articles, keyed by URL.
+
+    Entries younger than `ttl` seconds are used as they are. Older ones, up to
+    `max_age`, are revalidated with a conditional request using the ETag and
+    Last-Modified headers the publisher sent, and reused when it answers 304.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl: float, max_age: float):
+        self.ttl = ttl
+        self.responses = ResponseCache(path, max_entries, max(ttl, max_age), name="extraction")
+        self.fresh = 0
+        self.revalidated = 0
+        self.downloaded = 0
+
+    def get(self, url: str) -> Optional[CachedExtraction]:
+        cached = self.responses.get(ResponseCache.make_key(url))
+        if cached is None:
+            return None
+
+        article = cached.value['article']
+        if article.get('publish_date'):
+            article['publish_date'] = datetime.datetime.fromisoformat(article['publish_date'])
+        return CachedExtraction(article, cached.value.get('etag'), cached.value.get('last_modified'), cached.age)
+
+    def is_fresh(self, cached: CachedExtraction) -> bool:
+        return cached.age < self.ttl
+
+    def put(self, url: str, article: ExtractedArticleData, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        publish_date = article.get('publish_date')
+        self.responses.put(ResponseCache.make_key(url), {
+            'article': {**article, 'publish_date': publish_date.isoformat() if publish_date else None},
+            'etag': etag,
+            'last_modified': last_modified,
+        })
+
+    def record_fresh(self) -> None:
+        self.fresh += 1
+
+    def record_revalidated(self, url: str, cached: CachedExtraction) -> None:
+        """The publisher says the page hasn't changed, so the entry is fresh again"""
+        self.revalidated += 1
+        self.put(url, cached.article, cached.etag, cached.last_modified)
+
+    def record_downloaded(self, url: str, article: ExtractedArticleData, etag: Optional[str], last_modified: Optional[str]) -> None:
+        self.downloaded += 1
+        self.put(url, article, etag, last_modified)
+
+    def close(self) -> None:
+        self.responses.close()
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.responses.stats()
+        return {
+            "fresh": self.fresh,
+            "revalidated": self.revalidated,
+            "downloaded": self.downloaded,
+            "entries": stats["entries"],
+            "bytes": stats["bytes"],
+        }
@@ -0,0 +1,80 @@
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from logger import get_logger
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    expires_at: datetime.datetime  # Timezone-aware (UTC)
+
+    @classmethod
+    def build(cls, body: str, expires_at: datetime.datetime) -> 'CachedPage':
+        encoded = body.encode('utf-8')
+        return cls(encoded, hashlib.sha256(encoded).hexdigest()[:32], expires_at)
+
+    def is_expired(self) -> bool:
+        return self.expires_at <= datetime.datetime.now(datetime.timezone.utc)
+
+    def max_age(self) -> int:
+        return max(0, int((self.expires_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()))
+
+
+class PageCache:
+    """In-process LRU of rendered pages, bounded by the total size of their bodies"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.logger = get_logger()
+        self.hits = 0
+        self.misses = 0
+        self._size = 0
+        self._pages: 'OrderedDict[str, CachedPage]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None and page.is_expired():
+                self._remove(key)
+                page = None
+
+            if page is None:
+                self.misses += 1
+                return None
+
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: str, page: CachedPage) -> None:
+        if len(page.body) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._pages[key] = page
+            self._size += len(page.body)
+
+            while self._size > self.max_bytes:
+                oldest_key = next(iter(self._pages))
+                self._remove(oldest_key)
+                self.logger.debug(f"🧹  Evicted page '{oldest_key}' from page cache")
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        page = self._pages.pop(key, None)
+        if page is not None:
+            self._size -= len(page.body)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "pages": len(self._pages), "bytes": self._size, "max_bytes": self.max_bytes}
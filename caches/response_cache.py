@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from logger import get_logger
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class CachedResponse(NamedTuple):
+    value: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class ResponseCache:
+    """On-disk cache of JSON-serializable responses with a maximum age and LRU eviction.
+
+    Values are stored zlib-compressed in SQLite, so the cache is shared by every worker
+    process and survives restarts. Entries older than `max_age` seconds are never
+    returned; callers that serve stale data decide freshness themselves from the
+    entry's age, with `max_age` as the hard limit.
+    """
+
+    def __init__(self, path: str, max_entries: int, max_age: float, name: str = "response"):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.name = name
+        self.logger = get_logger()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  {self.name.capitalize()} cache disabled, could not open {path}: {e}")
+            self._connection = None
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256("\0".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if self._connection is None:
+            self.misses += 1
+            return None
+
+        entry = None
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT value, stored_at FROM responses WHERE key = ? AND stored_at > ?",
+                    (key, time.time() - self.max_age)
+                ).fetchone()
+
+                if row is not None:
+                    entry = CachedResponse(json.loads(zlib.decompress(row[0])), row[1])
+                    self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  {self.name.capitalize()} cache lookup failed: {e}")
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, value: Any) -> None:
+        if self._connection is None:
+            return
+
+        try:
+            blob = zlib.compress(json.dumps(value).encode('utf-8'))
+            now = time.time()
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, blob, now, now)
+                )
+                self._evict(now)
+                self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  {self.name.capitalize()} cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        if self._connection is None:
+            return
+
+        try:
+            with self._lock:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+        except Exception as e:
+            self.logger.warning(f"⚠️  {self.name.capitalize()} cache delete failed: {e}")
+
+    def _evict(self, now: float) -> None:
+        expired = self._connection.execute("DELETE FROM responses WHERE stored_at <= ?", (now - self.max_age,)).rowcount
+
+        count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+
+        if expired or overflow > 0:
+            self.logger.debug(f"🧹  Evicted {expired} expired and {max(overflow, 0)} least recently used {self.name} cache entries")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def stats(self) -> Dict[str, int]:
+        entries, size = 0, 0
+        if self._connection is not None:
+            try:
+                with self._lock:
+                    entries, size = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM responses").fetchone()
+            except Exception:
+                pass
+
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size, "max_entries": self.max_entries}
@@ -0,0 +1,122 @@
+import os
+import fcntl
+import hashlib
+import threading
+import numpy as np
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from logger import get_logger
+from typing import Dict, Iterable, Iterator, Optional
+
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid"}
+
+
+def normalize_url(url: str) -> str:
+    """Drop the fragment, tracking parameters and trailing slash, and lowercase scheme and host"""
+    parts = urlsplit(url.strip())
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def url_hash(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class SeenUrlIndex:
+    """Compact set of already delivered article URLs.
+
+    Holds a sorted array of 64-bit URL hashes (8 bytes per URL, binary-searched),
+    and is saved to `path` on every change so it survives restarts, and outlives
+    the articles table's retention window. Every worker process keeps its own copy,
+    merging in the file whenever another process has changed it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._loaded_mtime: Optional[float] = None
+        self.reload()
+
+    def reload(self) -> None:
+        """Merge in the saved index if another process changed it since we last looked"""
+        try:
+            mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+            if mtime is None or mtime == self._loaded_mtime:
+                return
+
+            saved = np.load(self.path).astype(np.uint64)
+            with self._lock:
+                self._hashes = np.union1d(self._hashes, saved)
+                self._loaded_mtime = mtime
+        except Exception as e:
+            self.logger.warning(f"⚠️  Could not load seen URLs from {self.path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str) or not url:
+            return False
+
+        target = np.uint64(url_hash(url))
+        hashes = self._hashes
+        position = np.searchsorted(hashes, target)
+        return bool(position < len(hashes) and hashes[position] == target)
+
+    def add(self, url: str) -> None:
+        self.add_many([url])
+
+    def add_many(self, urls: Iterable[str]) -> int:
+        """Add URLs, returning how many were new"""
+        new = np.array([url_hash(url) for url in urls if url], dtype=np.uint64)
+        self.reload()
+        with self._lock:
+            before = len(self._hashes)
+            self._hashes = np.union1d(self._hashes, new)
+            added = len(self._hashes) - before
+            if added:
+                self._save()
+        return added
+
+    def filter(self, articles: Iterable[Dict], key: str = 'url') -> Iterator[Dict]:
+        """Yield only the articles whose URL hasn't been seen"""
+        self.reload()
+        dropped = 0
+        for article in articles:
+            if article.get(key) in self:
+                dropped += 1
+                continue
+            yield article
+
+        if dropped:
+            self.logger.info(f"👀  Skipped {dropped} already delivered articles")
+
+    def _save(self) -> None:
+        temporary = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+            # Other worker processes save too: hold the lock file from reading their URLs until ours replace the file
+            with open(f"{self.path}.lock", 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if os.path.exists(self.path):
+                    self._hashes = np.union1d(self._hashes, np.load(self.path).astype(np.uint64))
+
+                with open(temporary, 'wb') as f:
+                    np.save(f, self._hashes)
+                os.replace(temporary, self.path)
+                self._loaded_mtime = os.path.getmtime(self.path)
+        except Exception as e:
+            self.logger.warning(f"⚠️  Could not save seen URLs to {self.path}: {e}")
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"urls": len(self._hashes), "bytes": self._hashes.nbytes}
@@ -19,6 +19,37 @@ class Config:
     supabase_key: str = os.getenv("SUPABASE_SERVICE_KEY", "")
     ntfy_topic: str = os.getenv("NTFY_TOPIC", "")
     email_enabled: bool = os.getenv("NEWSBOT_EMAIL_ENABLED", "false").lower() == "true"
+    preferences_embedding_dtype: str = os.getenv("NEWSBOT_PREFERENCES_DTYPE", "float32")
+    preferences_snapshot_interval: int = int(os.getenv("NEWSBOT_PREFERENCES_SNAPSHOT_INTERVAL", "20"))
+    preference_queue_size: int = int(os.getenv("NEWSBOT_PREFERENCE_QUEUE_SIZE", "100"))
+    preference_max_count: int = int(os.getenv("NEWSBOT_PREFERENCE_MAX_COUNT", "2000"))
+    preference_merge_threshold: float = float(os.getenv("NEWSBOT_PREFERENCE_MERGE_THRESHOLD", "0.85"))
+    preference_half_life_days: float = float(os.getenv("NEWSBOT_PREFERENCE_HALF_LIFE_DAYS", "90"))
+    preference_prune_below: float = float(os.getenv("NEWSBOT_PREFERENCE_PRUNE_BELOW", "0.25"))
+    preference_index: str = os.getenv("NEWSBOT_PREFERENCE_INDEX", "exact")  # "exact" or "ivf" (approximate)
+    preference_index_min_size: int = int(os.getenv("NEWSBOT_PREFERENCE_INDEX_MIN_SIZE", "500"))  # Preferences before lookups go through the index
+    preference_compaction_interval: int = int(os.getenv("NEWSBOT_PREFERENCE_COMPACTION_INTERVAL", str(6 * 60 * 60)))
+    data_dir: str = os.getenv("NEWSBOT_DATA_DIR", "data")
+    news_queries: str = os.getenv("NEWSBOT_NEWS_QUERIES", "world")  # Comma-separated NewsAPI queries
+    news_preference_queries: int = int(os.getenv("NEWSBOT_NEWS_PREFERENCE_QUERIES", "3"))  # Extra queries from top preferences
+    news_max_pages: int = int(os.getenv("NEWSBOT_NEWS_MAX_PAGES", "1"))
+    news_max_workers: int = int(os.getenv("NEWSBOT_NEWS_MAX_WORKERS", "4"))
+    news_requests_per_second: float = float(os.getenv("NEWSBOT_NEWS_REQUESTS_PER_SECOND", "2"))
+    news_cache_ttl: int = int(os.getenv("NEWSBOT_NEWS_CACHE_TTL", str(30 * 60)))  # Seconds a cached NewsAPI page is fresh
+    news_cache_stale: int = int(os.getenv("NEWSBOT_NEWS_CACHE_STALE", str(6 * 60 * 60)))  # Seconds after that it's served while refreshing
+    news_cache_max_entries: int = int(os.getenv("NEWSBOT_NEWS_CACHE_MAX_ENTRIES", "500"))
+    extraction_cache_ttl: int = int(os.getenv("NEWSBOT_EXTRACTION_CACHE_TTL", str(6 * 60 * 60)))  # Seconds an extracted article is used without asking the publisher
+    extraction_cache_max_age: int = int(os.getenv("NEWSBOT_EXTRACTION_CACHE_MAX_AGE", str(7 * 24 * 60 * 60)))  # Seconds it's kept for conditional revalidation
+    extraction_cache_max_entries: int = int(os.getenv("NEWSBOT_EXTRACTION_CACHE_MAX_ENTRIES", "1000"))
+    candidate_count: int = int(os.getenv("NEWSBOT_CANDIDATE_COUNT", "5"))
+    near_duplicate_threshold: float = float(os.getenv("NEWSBOT_NEAR_DUPLICATE_THRESHOLD", "0.6"))
+    preferred_sources: str = os.getenv("NEWSBOT_PREFERRED_SOURCES", "")  # Comma-separated source names or domains, best first
+    story_cluster_boost: float = float(os.getenv("NEWSBOT_STORY_CLUSTER_BOOST", "0.25"))
+    pipeline_max_workers: int = int(os.getenv("NEWSBOT_PIPELINE_MAX_WORKERS", "4"))
+    embedding_cache_max_entries: int = int(os.getenv("NEWSBOT_EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+    completion_cache_ttl: int = int(os.getenv("NEWSBOT_COMPLETION_CACHE_TTL", str(7 * 24 * 60 * 60)))  # Seconds a chat completion is reused
+    completion_cache_max_entries: int = int(os.getenv("NEWSBOT_COMPLETION_CACHE_MAX_ENTRIES", "2000"))
+    page_cache_max_bytes: int = int(os.getenv("NEWSBOT_PAGE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
 
     def validate(self) -> bool:
         required_fields = [
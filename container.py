@@ -0,0 +1,100 @@
+import os
+import atexit
+import threading
+import openai
+from supabase import create_client, Client
+from config import Config
+from logger import get_logger
+from http_session import close_session
+from caches import PageCache, SeenUrlIndex, ExtractionCache
+from services import AIService, NewsApiService, NotificationService
+from stores import PreferencesStore, ArticlesStore
+from preference_worker import PreferenceUpdateWorker
+from image_backfill import ImageBackfillWorker
+from image_mirror import ImageMirror
+from preference_matrix import configure_vector_index
+from typing import Optional
+
+_container: Optional['ServiceContainer'] = None
+_container_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+class ServiceContainer:
+    """Services and clients shared by every request in a worker process.
+
+    Holds a single Supabase client and a single OpenAI client, which are handed to
+    all stores and services instead of each of them connecting on its own.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = get_logger()
+        configure_vector_index(config.preference_index, config.preference_index_min_size)
+
+        self.openai_client = openai.OpenAI(api_key=config.openai_api_key)
+        self.supabase: Client = create_client(config.supabase_url, config.supabase_key)
+
+        self.ai_service = AIService(config, self.openai_client)
+        self.news_service = NewsApiService(config)
+        self.image_mirror = ImageMirror(config)
+        self.notification_service = NotificationService(config, self.image_mirror)
+        self.seen_urls = SeenUrlIndex(os.path.join(config.data_dir, "seen_urls.npy"))
+        self.articles_store = ArticlesStore(config, self.supabase, self.seen_urls)
+        self.preferences_store = PreferencesStore(config, self.supabase)
+        self.page_cache = PageCache(config.page_cache_max_bytes)
+        self.extraction_cache = ExtractionCache(
+            os.path.join(config.data_dir, "extractions.sqlite3"),
+            config.extraction_cache_max_entries,
+            config.extraction_cache_ttl,
+            config.extraction_cache_max_age
+        )
+        self.preference_worker = PreferenceUpdateWorker(self.ai_service, self.preferences_store, config.preference_queue_size)
+        self.preference_worker.start()
+        self.image_worker = ImageBackfillWorker(self.ai_service, self.articles_store, self.page_cache, self.image_mirror)
+
+        # Articles delivered before the index existed, or by another instance, are picked up from the table
+        added = self.seen_urls.add_many(self.articles_store.get_stored_urls())
+        self.logger.info(f"👀  Seen URL index has {len(self.seen_urls)} URLs ({added} new from stored articles)")
+
+        self.logger.info(f"📦  Service container started (pid {os.getpid()})")
+
+    def close(self) -> None:
+        self.preference_worker.stop()
+        self.image_worker.stop()
+        self.news_service.close()
+        self.ai_service.embedding_cache.close()
+        self.ai_service.completion_cache.close()
+        self.extraction_cache.close()
+        self.openai_client.close()
+        close_session()
+        self.logger.info(f"📦  Service container closed (pid {os.getpid()})")
+
+
+def get_container() -> ServiceContainer:
+    """Return this worker's service container, starting it on first use.
+
+    The container is rebuilt after a fork, so each gunicorn worker gets its own clients.
+    """
+    global _container, _container_pid
+
+    if _container is None or _container_pid != os.getpid():
+        with _lock:
+            if _container is None or _container_pid != os.getpid():
+                _container = ServiceContainer(Config())
+                _container_pid = os.getpid()
+
+    return _container
+
+
+def close_container() -> None:
+    global _container, _container_pid
+
+    with _lock:
+        if _container is not None and _container_pid == os.getpid():
+            _container.close()
+        _container = None
+        _container_pid = None
+
+
+atexit.register(close_container)
@@ -0,0 +1,122 @@
+import json
+import base64
+import numpy as np
+from preference_matrix import PreferenceMatrix
+from typing import Any, Dict, Sequence, Union
+
+# Packed little-endian dtypes embeddings can be encoded as
+EMBEDDING_DTYPES = {
+    "float32": np.dtype('<f4'),
+    "float16": np.dtype('<f2'),
+}
+
+
+def encode_embedding(embedding: Union[np.ndarray, Sequence[float]], dtype: str = "float32") -> str:
+    """Pack an embedding as little-endian float32/float16 and base64 encode it"""
+    packed = np.asarray(embedding, dtype=EMBEDDING_DTYPES[dtype]).tobytes()
+    return base64.b64encode(packed).decode('ascii')
+
+
+def decode_embedding(encoded: str, dtype: str = "float32") -> np.ndarray:
+    """Inverse of encode_embedding, always returning float32"""
+    return np.frombuffer(base64.b64decode(encoded), dtype=EMBEDDING_DTYPES[dtype]).astype(np.float32)
+
+
+# # # # # # # # # # # # PREFERENCES STORAGE # # # # # # # # # # # #
+
+# Marker for preferences stored as one packed embedding matrix. Rows without it are
+# the legacy keyword -> {"score", "embedding": [floats]} JSON shape.
+PACKED_PREFERENCES_FORMAT = "packed-v1"
+
+
+def is_packed_preferences(stored: Any) -> bool:
+    return isinstance(stored, dict) and stored.get("_format") == PACKED_PREFERENCES_FORMAT
+
+
+def encode_preferences(preferences: PreferenceMatrix, dtype: str = "float32") -> Dict[str, Any]:
+    """Encode preferences for the `preferences` JSON column as one packed, base64 matrix"""
+    return {
+        "_format": PACKED_PREFERENCES_FORMAT,
+        "dtype": dtype,
+        "dimensions": preferences.dimensions,
+        "keywords": list(preferences.keywords),
+        "scores": [preferences.get_score(keyword) for keyword in preferences.keywords],
+        "updated_at": [int(updated_at) for updated_at in preferences.updated_at],
+        "embeddings": encode_embedding(preferences.embeddings, dtype),
+    }
+
+
+def decode_preferences(stored: Any) -> PreferenceMatrix:
+    """Decode a stored `preferences` value, reading packed and legacy JSON rows alike"""
+    if isinstance(stored, str):
+        stored = json.loads(stored)
+
+    if is_preferences_delta(stored):
+        raise ValueError("Preferences delta must be applied to its base version, not decoded on its own")
+
+    if not is_packed_preferences(stored):
+        return PreferenceMatrix.from_dict(stored)
+
+    keywords = stored["keywords"]
+    embeddings = decode_embedding(stored["embeddings"], stored["dtype"]).reshape(len(keywords), stored["dimensions"])
+    # Rows packed before update times were tracked have none
+    return PreferenceMatrix.from_arrays(keywords, embeddings, stored["scores"], stored.get("updated_at"))
+
+
+# Marker for a version stored as changes against the previous version
+PREFERENCES_DELTA_FORMAT = "delta-v1"
+
+
+def is_preferences_delta(stored: Any) -> bool:
+    return isinstance(stored, dict) and stored.get("_format") == PREFERENCES_DELTA_FORMAT
+
+
+def encode_preferences_delta(base: PreferenceMatrix, preferences: PreferenceMatrix, base_version: int, dtype: str = "float32") -> Dict[str, Any]:
+    """Encode `preferences` as the changes needed to get there from `base`.
+
+    Keywords that are new, or whose embedding changed, are packed in full under
+    "added". Existing keywords whose score changed only carry the new score and
+    update time.
+    """
+    removed = [keyword for keyword in base.keywords if keyword not in preferences]
+
+    added, scores, updated_at = [], {}, {}
+    for keyword in preferences.keywords:
+        if keyword not in base or not np.array_equal(base.get_embedding(keyword), preferences.get_embedding(keyword)):
+            added.append(keyword)
+        elif base.get_score(keyword) != preferences.get_score(keyword) or base.get_updated_at(keyword) != preferences.get_updated_at(keyword):
+            scores[keyword] = preferences.get_score(keyword)
+            updated_at[keyword] = int(preferences.get_updated_at(keyword))
+
+    added_rows = PreferenceMatrix.from_arrays(
+        added,
+        np.array([preferences.get_embedding(keyword) for keyword in added], dtype=np.float32).reshape(len(added), preferences.dimensions),
+        [preferences.get_score(keyword) for keyword in added],
+        [preferences.get_updated_at(keyword) for keyword in added]
+    )
+
+    return {
+        "_format": PREFERENCES_DELTA_FORMAT,
+        "base_version": base_version,
+        "scores": scores,
+        "updated_at": updated_at,
+        "removed": removed,
+        "added": encode_preferences(added_rows, dtype),
+    }
+
+
+def apply_preferences_delta(base: PreferenceMatrix, delta: Dict[str, Any]) -> PreferenceMatrix:
+    """Return a copy of `base` with a stored delta applied"""
+    preferences = base.copy()
+    preferences.remove(delta["removed"])
+
+    # Deltas written before update times were tracked keep the base's time
+    updated_at = delta.get("updated_at", {})
+    for keyword, score in delta["scores"].items():
+        preferences.set_score(keyword, score, updated_at.get(keyword, preferences.get_updated_at(keyword)))
+
+    added = decode_preferences(delta["added"])
+    for keyword in added.keywords:
+        preferences.add(keyword, added.get_score(keyword), added.get_embedding(keyword), added.get_updated_at(keyword))
+
+    return preferences
@@ -0,0 +1,18 @@
+# Gunicorn picks this file up automatically from the working directory
+from logger import get_logger
+
+
+def post_worker_init(worker):
+    # Build the worker's service container up front, so the first request doesn't pay for it
+    from container import get_container
+
+    try:
+        get_container()
+    except Exception as e:
+        get_logger().error(f"❌  Failed to start service container in worker {worker.pid}: {e}")
+
+
+def worker_exit(server, worker):
+    from container import close_container
+
+    close_container()
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Optional
+
+HTTP_POOL_HOSTS = 20  # Hosts kept in the pool manager at once
+HTTP_POOL_MAXSIZE = 10  # Keep-alive connections per host
+HTTP_TIMEOUT = (5, 30)  # (connect, read) seconds, unless a call passes its own
+HTTP_RETRIES = 2  # Retries for connection errors and 429/5xx on idempotent requests
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_MAX_RETRY_AFTER = 10  # Seconds we wait on a Retry-After header at most, whatever the server asks for
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+class CappedRetry(Retry):
+    """Retry that honours Retry-After, but never sleeps longer than HTTP_MAX_RETRY_AFTER"""
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, HTTP_MAX_RETRY_AFTER)
+
+
+class PooledSession(requests.Session):
+    """requests.Session with keep-alive pools, a shared retry policy and default timeouts"""
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        retry = CappedRetry(
+            total=HTTP_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=HTTP_RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_HOSTS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            pool_block=True,  # Enforce the per-host limit instead of opening throwaway connections
+            max_retries=retry,
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return super().request(method, url, *args, **kwargs)
+
+
+class RateLimiter:
+    """Token bucket: on average `rate` calls per second, in bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a call is allowed, returning how long we waited"""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Take the token now, even if it's not there yet, so waiting callers queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session, creating it on first use.
+
+    A fresh session is created after a fork, so gunicorn workers never share sockets.
+    """
+    global _session, _session_pid
+
+    if _session is None or _session_pid != os.getpid():
+        with _lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = PooledSession()
+                _session_pid = os.getpid()
+
+    return _session
+
+
+def close_session() -> None:
+    global _session, _session_pid
+
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """Per-host request and connection counts for the pools that are currently open"""
+    stats: Dict[str, Dict[str, int]] = {}
+    if _session is None or _session_pid != os.getpid():
+        return stats
+
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] += max(0, pool.num_requests - pool.num_connections)
+
+    return stats
+
+
+def format_connection_stats() -> str:
+    return ", ".join(
+        f"{host}: {data['requests']} requests over {data['connections']} connections"
+        for host, data in sorted(connection_stats().items())
+    ) or "no connections"
@@ -0,0 +1,96 @@
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
+from logger import get_logger
+from services import AIService
+from stores import ArticlesStore
+from caches import PageCache
+from image_mirror import ImageMirror
+from typing import Callable, Dict, Optional
+
+# An article whose image_url is still None this long after it was stored isn't getting one
+IMAGE_PENDING_TIMEOUT = 10 * 60
+
+
+def is_image_pending(article_data: Dict) -> bool:
+    """True while the article's image is still being generated.
+
+    A stored image_url of None means the image is pending, and an empty string that
+    there is none. Articles stored before images were backfilled also have None, so
+    pending expires after IMAGE_PENDING_TIMEOUT.
+    """
+    if article_data.get('image_url') is not None:
+        return False
+
+    try:
+        created_at = datetime.datetime.fromisoformat(article_data['created_at'])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    # Articles are stored with naive timestamps from the server clock
+    now = datetime.datetime.now(created_at.tzinfo) if created_at.tzinfo else datetime.datetime.now()
+    return (now - created_at).total_seconds() < IMAGE_PENDING_TIMEOUT
+
+
+class ImageBackfillWorker:
+    """Generates article images in the background and writes them back to stored articles.
+
+    Articles are stored and announced as soon as they are summarized. The image
+    follows once generated: it's mirrored to local disk when an ImageMirror is
+    given, its URL is saved with `update_image_url`, the article's cached page is
+    dropped so the next view renders it, and `on_ready` gets the URL, e.g. to send
+    the email that shows the image.
+    """
+
+    def __init__(self, ai_service: AIService, articles_store: ArticlesStore, page_cache: PageCache, image_mirror: Optional[ImageMirror] = None):
+        self.ai_service = ai_service
+        self.articles_store = articles_store
+        self.page_cache = page_cache
+        self.image_mirror = image_mirror
+        self.logger = get_logger()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-backfill")
+
+        self.generated = 0
+        self.failed = 0
+        self.last_seconds: Optional[float] = None
+
+    def submit(self, article_id: str, title: str, summary: str, on_ready: Optional[Callable[[str], None]] = None) -> 'Future[str]':
+        """Queue an article's image, returning a future of its URL ("" if there is none)"""
+        return self._executor.submit(self._backfill, article_id, title, summary, on_ready)
+
+    def _backfill(self, article_id: str, title: str, summary: str, on_ready: Optional[Callable[[str], None]] = None) -> str:
+        started = time.perf_counter()
+        image_url = ""
+        try:
+            image_url = self.ai_service.generate_image(title, summary)
+        except Exception as e:
+            self.logger.error(f"❌  Failed to generate image for article {article_id}: {e}")
+
+        # Keep the provider's URL if mirroring fails; it works until it expires
+        if image_url and self.image_mirror is not None:
+            image_url = self.image_mirror.mirror(article_id, image_url) or image_url
+
+        # Store "" when generation failed, so the page stops waiting for an image
+        if self.articles_store.update_image_url(article_id, image_url):
+            self.page_cache.invalidate(article_id)
+
+        self.last_seconds = time.perf_counter() - started
+        if image_url:
+            self.generated += 1
+            self.logger.info(f"🖼️  Backfilled image for article {article_id} in {self.last_seconds:.1f}s")
+        else:
+            self.failed += 1
+
+        if on_ready is not None:
+            try:
+                on_ready(image_url)
+            except Exception as e:
+                self.logger.error(f"❌  Failed to hand over image of article {article_id}: {e}")
+        return image_url
+
+    def stop(self) -> None:
+        # Finish the image being generated, but drop any that haven't started
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {"generated": self.generated, "failed": self.failed, "last_seconds": self.last_seconds}
@@ -0,0 +1,137 @@
+import io
+import os
+import re
+import time
+import shutil
+from html import escape
+from PIL import Image
+from config import Config
+from logger import get_logger
+from http_session import get_session
+from utils import SafeHtml
+from typing import Dict, List, Optional
+
+IMAGE_WIDTHS = (480, 960, 1440)  # Phones, tablets and high-density screens
+IMAGE_DEFAULT_WIDTH = 960  # Served to clients that ignore srcset
+IMAGE_FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60  # Variants never change once written
+IMAGE_FILENAME = re.compile(r'^(\d+)\.(webp|jpg)$')
+IMAGE_ID = re.compile(r'^[0-9a-f-]{36}$')
+MIRRORED_IMAGE_URL = re.compile(r'/images/([0-9a-f-]{36})/\d+\.jpg$')
+
+
+class ImageMirror:
+    """Keeps article images on local disk as resized WebP and JPEG variants.
+
+    Generated image URLs expire after about an hour and point at a ~2 MB PNG, so
+    each image is downloaded once and written to `data/images/<article_id>/` at a
+    few widths. Pages then reference the variants with srcset, and browsers pick
+    the smallest one that fits.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.root = os.path.abspath(os.path.join(config.data_dir, "images"))
+        self.logger = get_logger()
+
+    def directory(self, article_id: str) -> str:
+        return os.path.join(self.root, article_id)
+
+    def url(self, article_id: str, width: int, extension: str) -> str:
+        return f"{self.config.domain}/images/{article_id}/{width}.{extension}"
+
+    def mirror(self, article_id: str, source_url: str) -> str:
+        """Download an image and write its variants, returning the default variant's URL ("" on failure)"""
+        if not IMAGE_ID.match(article_id):
+            return ""
+
+        temporary = f"{self.directory(article_id)}.tmp-{os.getpid()}"
+        try:
+            started = time.perf_counter()
+            response = get_session().get(source_url, timeout=60)
+            response.raise_for_status()
+
+            with Image.open(io.BytesIO(response.content)) as image:
+                image = image.convert("RGB")
+                widths = sorted({width for width in IMAGE_WIDTHS if width < image.width} | {min(image.width, IMAGE_WIDTHS[-1])})
+
+                os.makedirs(temporary, exist_ok=True)
+                written = 0
+                for width in widths:
+                    resized = image if width == image.width else image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+                    for extension, (image_format, options) in IMAGE_FORMATS.items():
+                        path = os.path.join(temporary, f"{width}.{extension}")
+                        resized.save(path, image_format, **options)
+                        written += os.path.getsize(path)
+
+            # Swap the finished directory in, so readers never see half-written variants
+            shutil.rmtree(self.directory(article_id), ignore_errors=True)
+            os.replace(temporary, self.directory(article_id))
+
+            self.logger.info(
+                f"🗜️  Mirrored image for article {article_id}: {len(response.content) // 1024} KB source, "
+                f"{len(widths) * len(IMAGE_FORMATS)} variants totalling {written // 1024} KB in {time.perf_counter() - started:.1f}s"
+            )
+            return self.url(article_id, self._default_width(widths), "jpg")
+
+        except Exception as e:
+            self.logger.error(f"❌  Failed to mirror image for article {article_id}: {e}")
+            shutil.rmtree(temporary, ignore_errors=True)
+            return ""
+
+    def variants(self, article_id: str) -> Dict[str, List[int]]:
+        """Available widths per file extension"""
+        variants: Dict[str, List[int]] = {}
+        try:
+            for filename in os.listdir(self.directory(article_id)):
+                match = IMAGE_FILENAME.match(filename)
+                if match:
+                    variants.setdefault(match.group(2), []).append(int(match.group(1)))
+        except OSError:
+            pass
+        return {extension: sorted(widths) for extension, widths in variants.items()}
+
+    def image_html(self, image_url: Optional[str], sizes: str, webp: bool = True) -> SafeHtml:
+        """An <img> for the article image, with srcset variants when it was mirrored"""
+        if not image_url:
+            return SafeHtml('')
+
+        match = MIRRORED_IMAGE_URL.search(image_url)
+        variants = self.variants(match.group(1)) if match else {}
+        if not variants.get("jpg"):
+            return SafeHtml(f'<img src="{escape(image_url)}" alt="Article image" class="image">')
+
+        article_id = match.group(1)
+
+        def srcset(extension: str) -> str:
+            return escape(", ".join(f"{self.url(article_id, width, extension)} {width}w" for width in variants[extension]))
+
+        img = (
+            f'<img src="{escape(self.url(article_id, self._default_width(variants["jpg"]), "jpg"))}" '
+            f'srcset="{srcset("jpg")}" sizes="{escape(sizes)}" alt="Article image" class="image">'
+        )
+        if not webp or not variants.get("webp"):
+            return SafeHtml(img)
+        return SafeHtml(f'<picture><source type="image/webp" srcset="{srcset("webp")}" sizes="{escape(sizes)}">{img}</picture>')
+
+    def cleanup(self, max_age_days: int) -> None:
+        """Delete the images of articles older than `max_age_days`"""
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        removed = 0
+        try:
+            for entry in os.scandir(self.root):
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.logger.error(f"❌  Failed to clean up old images: {e}")
+
+        if removed:
+            self.logger.info(f"🧹  Cleaned up images of {removed} expired articles")
+
+    @staticmethod
+    def _default_width(widths: List[int]) -> int:
+        fitting = [width for width in widths if width <= IMAGE_DEFAULT_WIDTH]
+        return max(fitting) if fitting else min(widths)
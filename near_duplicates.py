@@ -0,0 +1,123 @@
+import re
+import zlib
+import numpy as np
+from collections import defaultdict
+from logger import get_logger
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+SHINGLE_SIZE = 5  # Character shingles survive small wording changes between outlets
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always share a band
+
+_PRIME = (1 << 31) - 1  # Keeps (a * x + b) within uint64
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashed character shingles of the lowercased, punctuation-free text"""
+    normalized = " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+    if not normalized:
+        return set()
+
+    pieces = [normalized[i:i + SHINGLE_SIZE] for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))]
+    return {zlib.crc32(piece.encode()) & _PRIME for piece in pieces}
+
+
+def minhash(hashed_shingles: Set[int]) -> np.ndarray:
+    """MinHash signature: the fraction of equal positions estimates Jaccard similarity"""
+    values = np.fromiter(hashed_shingles, dtype=np.uint64, count=len(hashed_shingles))
+    return ((np.outer(values, _A) + _B) % _PRIME).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index that groups near-identical texts into clusters.
+
+    Each added text is compared only against earlier texts sharing an LSH band,
+    and joins the cluster of the most similar one at or above the threshold.
+    """
+
+    def __init__(self, threshold: float = 0.6, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = NUM_PERMUTATIONS // bands
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[Optional[np.ndarray]] = []
+        self._clusters: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, text: str) -> int:
+        """Index a text and return its cluster, the id of the cluster's first text"""
+        item = len(self._signatures)
+        hashed_shingles = shingles(text)
+        if not hashed_shingles:
+            # Nothing to compare on, so it stays a cluster of its own
+            self._signatures.append(None)
+            self._clusters.append(item)
+            return item
+
+        signature = minhash(hashed_shingles)
+        bands = [(band, signature[band * self._rows:(band + 1) * self._rows].tobytes()) for band in range(self.bands)]
+
+        best, best_similarity = None, self.threshold
+        for candidate in {other for band in bands for other in self._buckets.get(band, ())}:
+            similarity = float(np.mean(signature == self._signatures[candidate]))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+
+        for band in bands:
+            self._buckets[band].append(item)
+        self._signatures.append(signature)
+        self._clusters.append(self._clusters[best] if best is not None else item)
+        return self._clusters[item]
+
+
+def article_text(article: Dict) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def collapse_near_duplicates(articles: Iterable[Dict], threshold: float = 0.6, preferred_sources: Sequence[str] = ()) -> Iterator[Dict]:
+    """Collapse copies of the same story into one article per story, as articles stream in.
+
+    A story is yielded as soon as its first article arrives, and stays the same dict
+    while later copies are folded into it: `cluster_size` counts the articles it
+    stands for, and a copy from a higher-ranked preferred source (matched on the
+    source name or URL domain) replaces its fields. Consumers that read those fields
+    once the stream is exhausted therefore see the same result as a batch pass.
+    """
+    index = NearDuplicateIndex(threshold)
+    preferred = [source.strip().lower() for source in preferred_sources if source.strip()]
+    stories: Dict[int, Dict] = {}
+    seen = 0
+
+    for article in articles:
+        seen += 1
+        cluster = index.add(article_text(article))
+        story = stories.get(cluster)
+
+        if story is None:
+            stories[cluster] = story = {**article, "cluster_size": 1}
+            yield story
+            continue
+
+        cluster_size = story["cluster_size"] + 1
+        if _source_rank(article, preferred) < _source_rank(story, preferred):
+            story.clear()
+            story.update(article)
+        story["cluster_size"] = cluster_size
+
+    if len(stories) < seen:
+        get_logger().info(f"🧬  Collapsed {seen} articles into {len(stories)} stories")
+
+
+def _source_rank(article: Dict, preferred: List[str]) -> int:
+    source = ((article.get('source') or {}).get('name') or '').lower()
+    url = (article.get('url') or '').lower()
+
+    for rank, name in enumerate(preferred):
+        if name == source or f"//{name}/" in url or f".{name}/" in url:
+            return rank
+    return len(preferred)
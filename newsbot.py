@@ -1,15 +1,34 @@
 from config import Config
 from logger import get_logger
-from flask import Flask, jsonify, Response
+from flask import Flask, jsonify, request, Response, send_from_directory
 import os
+import json
+import zlib
+import queue
+import datetime
 import threading
-from services import AIService, NewsApiService, NotificationService
-from stores import PreferencesStore, ArticlesStore
-from _types import PreferencesWithEmbeddings
-from utils import render_template, extract_article_content
-from typing import Union, Tuple
+from html import escape
+from container import get_container
+from caches import CachedPage
+from stores.articles_store import ARTICLE_PAGE_COLUMNS, ARTICLE_RETENTION_DAYS
+from preference_matrix import PreferenceMatrix
+from embedding_codec import encode_embedding, EMBEDDING_DTYPES
+from utils import render_template, preload_templates, extract_first_available_article, SafeHtml
+from pipeline import Pipeline, Stage
+from near_duplicates import collapse_near_duplicates
+from image_backfill import is_image_pending
+from image_mirror import IMAGE_FILENAME, IMAGE_ID, IMAGE_MAX_AGE
+from http_session import format_connection_stats
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union, Tuple
 
 app = Flask(__name__)
+preload_templates()
+
+PREFERENCE_EMBEDDING_ENCODINGS = ('json', *EMBEDDING_DTYPES, 'none')
+ARTICLE_IMAGE_SIZES = "(max-width: 700px) 100vw, 700px"  # The article page's content width
+SSE_KEEPALIVE_SECONDS = 15  # Comment lines keep idle proxies from closing the event stream
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
 
 
 @app.route('/')
@@ -20,127 +39,305 @@ def health_check() -> Response:
 @app.route('/trigger', methods=['POST'])
 def trigger_newsbot() -> Union[Response, Tuple[Response, int]]:
     try:
-        logger = get_logger()
-        logger.info("🤖  Triggering the NewsBot")
-
-        config = Config()
-        if not config.validate():
-            logger.error("⚠️  Missing required environment variables")
-            return jsonify({"status": "error", "message": "Missing required environment variables"}), 500
-
-        ai_service = AIService(config)
-        news_service = NewsApiService(config)
-        notification_service = NotificationService(config)
-        articles_store = ArticlesStore(config)
-        preferences_store = PreferencesStore(config)
-
-        articles_store.cleanup_old_articles()
-        preferences: PreferencesWithEmbeddings = preferences_store.get_preferences_with_embeddings()
-        articles = news_service.fetch_top_news_articles()
-        article = ai_service.select_best_article_with_embeddings(articles, preferences)
-
-        if article:
-            title = article['title']
-            logger.info(f"🗞️  Found article: {title}")
-
-            article_data = extract_article_content(article['url'])
-            if not article_data:
-                return jsonify({"status": "error", "message": "Failed to extract article content"}), 500
-
-            summary = ai_service.summarize_article(article_data['content'])
-            subject = "📰 " + ai_service.generate_subject_line(title, summary)
-            image_url = ai_service.generate_image(title, summary)
-
-            article_id = articles_store.store_article(
-                article_data,
-                summary,
-                image_url
-            )
-
-            notification_service.notify(article, summary, subject, image_url, article_id)
-            logger.info(f"📄  Article available at: {config.domain}/article/{article_id}")
-            return jsonify({"status": "success", "message": "News email sent successfully!", "article_id": article_id})
-        else:
-            logger.warning("❌  No articles found")
-            return jsonify({"status": "warning", "message": "No articles found"}), 200
+        payload, status = run_newsbot(_refresh_requested())
+        return jsonify(payload), status
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/trigger/stream', methods=['POST'])
+def trigger_newsbot_stream() -> Response:
+    """Run the NewsBot like /trigger, reporting progress as Server-Sent Events.
+
+    Events are fetched, scored, extracted, summary (one per streamed piece of
+    text), stored, notified and image, followed by done with the same payload
+    /trigger returns. The image event only says the image is being generated:
+    waiting for it would hold this worker for the slowest step, so the stream
+    ends once the push is sent. The run happens on its own thread, so it
+    finishes even if the client goes away.
+    """
+    refresh = _refresh_requested()
+    events: 'queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]' = queue.Queue()
+
+    def run() -> None:
+        try:
+            payload, status = run_newsbot(refresh, lambda event, data: events.put((event, data)))
+            events.put(("done", {**payload, "status_code": status}))
+        except Exception as e:
+            events.put(("done", {"status": "error", "message": str(e), "status_code": 500}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="trigger-stream", daemon=True).start()
+
+    def stream() -> Iterator[str]:
+        # Sent straight away, so the client knows the run started
+        yield ": started\n\n"
+        while True:
+            try:
+                item = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                return
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    # X-Accel-Buffering stops proxies from holding events back until the response ends
+    return Response(stream(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _refresh_requested() -> bool:
+    # ?refresh=1 skips the NewsAPI response cache
+    return request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+
+
+def run_newsbot(refresh: bool = False, emit: Optional[EventCallback] = None) -> Tuple[Dict[str, Any], int]:
+    """Pick, summarize, store and announce today's article, returning the response payload and status code.
+
+    `emit` is called with (event, data) as each step completes, from whichever
+    thread ran it; summaries are streamed when it's given. The image and the
+    email that shows it follow in the background, after this returns.
+    """
+    logger = get_logger()
+    logger.info("🤖  Triggering the NewsBot")
+
+    def report(event: str, **data: Any) -> None:
+        if emit is not None:
+            emit(event, data)
+
+    config = Config()
+    if not config.validate():
+        logger.error("⚠️  Missing required environment variables")
+        return {"status": "error", "message": "Missing required environment variables"}, 500
+
+    services = get_container()
+    ai_service = services.ai_service
+    news_service = services.news_service
+    notification_service = services.notification_service
+    articles_store = services.articles_store
+    preferences_store = services.preferences_store
+
+    def select_candidates(preferences: PreferenceMatrix) -> List[Dict]:
+        # Articles stream in page by page, and are scored one embedding batch at a time as they arrive.
+        # Copies of the same story from different outlets are only embedded and scored once,
+        # and articles we already delivered are dropped before anything is embedded.
+        articles = services.seen_urls.filter(news_service.iter_articles(
+            news_service.queries_for(preferences),
+            refresh=refresh,
+            on_page=lambda query, page, count, source: report("fetched", query=query, page=page, articles=count, source=source)
+        ))
+        stories = collapse_near_duplicates(articles, config.near_duplicate_threshold, config.preferred_sources.split(","))
+        candidates = ai_service.select_top_articles_with_embeddings(stories, preferences, config.candidate_count)
+        report("scored", candidates=[{"title": candidate.get('title'), "url": candidate.get('url')} for candidate in candidates])
+        return candidates
+
+    gather_pipeline = Pipeline("gather", [
+        Stage("cleanup", articles_store.cleanup_old_articles),
+        Stage("image_cleanup", lambda: services.image_mirror.cleanup(ARTICLE_RETENTION_DAYS)),
+        Stage("preferences", preferences_store.get_preferences_with_embeddings),
+        Stage("candidates", select_candidates, ("preferences",)),
+    ], max_workers=config.pipeline_max_workers)
+    candidates = gather_pipeline.run()["candidates"]
+
+    if not candidates:
+        logger.warning("❌  No articles found")
+        return {"status": "warning", "message": "No articles found"}, 200
+
+    extracted = extract_first_available_article(candidates, max_workers=config.candidate_count, cache=services.extraction_cache)
+    if not extracted:
+        return {"status": "error", "message": "Failed to extract article content"}, 500
+
+    article, article_data = extracted
+    title = article['title']
+    logger.info(f"🗞️  Found article: {title}")
+    report("extracted", title=title, url=article['url'])
+
+    def summarize() -> str:
+        on_token = (lambda text: report("summary", text=text)) if emit is not None else None
+        return ai_service.summarize_article(article_data['content'], on_token=on_token)
+
+    def store(summary: str) -> str:
+        article_id = articles_store.store_article(article_data, summary)
+        report("stored", article_id=article_id, url=f"{config.domain}/article/{article_id}")
+        return article_id
+
+    def push(article_id: str) -> None:
+        notification_service.send_push(article, article_id)
+        report("notified", article_id=article_id)
+
+    # The article is stored and the push sent as soon as it's summarized; the image is
+    # generated afterwards and backfilled, so it never delays the notification
+    publish_pipeline = Pipeline("publish", [
+        Stage("summary", summarize),
+        Stage("subject", lambda summary: "📰 " + ai_service.generate_subject_line(title, summary), ("summary",)),
+        Stage("article_id", store, ("summary",)),
+        Stage("push", push, ("article_id",)),
+    ], max_workers=config.pipeline_max_workers)
+    published = publish_pipeline.run()
+    article_id, summary, subject = published["article_id"], published["summary"], published["subject"]
+
+    def send_email(image_url: Optional[str]) -> None:
+        notification_service.send_email(article, summary, subject, image_url, article_id)
+
+    if article_id:
+        # The email shows the image, so it goes out once the image is ready
+        services.image_worker.submit(article_id, title, summary, on_ready=send_email)
+        report("image", status="pending", article_url=f"{config.domain}/article/{article_id}")
+        message = "Push notification sent, news email will go out once the image is ready"
+    else:
+        send_email(None)
+        message = "News email sent successfully!"
+
+    logger.info(f"🔌  HTTP connection reuse: {format_connection_stats()}")
+    logger.info(f"📄  Article available at: {config.domain}/article/{article_id}")
+    return {"status": "success", "message": message, "article_id": article_id}, 200
+
+
 @app.route('/preferences', methods=['GET'])
-def get_preferences() -> PreferencesWithEmbeddings:
-    preferences_store = PreferencesStore(Config())
+def get_preferences() -> Union[Response, Tuple[Response, int]]:
+    """Stream preferences as JSON.
+
+    ?embeddings=json (default) returns float lists, float32/float16 return base64
+    packed little-endian blobs, and none returns scores only. The body is gzipped
+    when the client accepts it.
+    """
+    encoding = request.args.get('embeddings', 'json')
+    if encoding not in PREFERENCE_EMBEDDING_ENCODINGS:
+        return jsonify({"status": "error", "message": f"embeddings must be one of {', '.join(PREFERENCE_EMBEDDING_ENCODINGS)}"}), 400
+
+    preferences = get_container().preferences_store.get_preferences_with_embeddings()
+    chunks = _stream_preferences_json(preferences, encoding)
+
+    headers = {"X-Embedding-Encoding": encoding, "Vary": "Accept-Encoding"}
+    if request.accept_encodings['gzip']:
+        chunks = _gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(chunks, mimetype='application/json', headers=headers)
+
+
+def _stream_preferences_json(preferences: PreferenceMatrix, encoding: str) -> Iterator[bytes]:
+    yield b'{'
+    for i, keyword in enumerate(preferences.keywords):
+        entry: Dict[str, Any] = {"score": preferences.get_score(keyword)}
+        if encoding == 'json':
+            entry["embedding"] = preferences.get_embedding(keyword).tolist()
+        elif encoding != 'none':
+            entry["embedding"] = encode_embedding(preferences.get_embedding(keyword), encoding)
 
-    return preferences_store.get_preferences_with_embeddings()
+        yield (',' if i else '').encode() + json.dumps(keyword).encode() + b':' + json.dumps(entry).encode()
+    yield b'}'
+
+
+def _gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@app.route('/preferences/updates', methods=['GET'])
+def get_preference_updates() -> Response:
+    return jsonify(get_container().preference_worker.stats())
 
 
 @app.route('/article/<article_id>')
-def view_article(article_id: str) -> Union[str, Tuple[Response, int]]:
+def view_article(article_id: str) -> Union[Response, Tuple[Response, int]]:
     try:
-        config = Config()
-        articles_store = ArticlesStore(config)
+        services = get_container()
 
-        article_data = articles_store.get_article(article_id)
-        if not article_data:
-            return jsonify({"status": "error", "message": "Article not found or expired"}), 404
+        # Stored articles only change once, when their image is backfilled, so rendered pages are cached in memory
+        page = services.page_cache.get(article_id)
+        image_pending = False
+        if page is None:
+            article_data = services.articles_store.get_article(article_id, ARTICLE_PAGE_COLUMNS)
+            if not article_data:
+                return jsonify({"status": "error", "message": "Article not found or expired"}), 404
+
+            image_pending = is_image_pending(article_data)
+            if article_data.get('image_url'):
+                image_html = services.image_mirror.image_html(article_data['image_url'], ARTICLE_IMAGE_SIZES)
+            elif image_pending:
+                image_html = SafeHtml('<div class="image image-pending">🎨 The illustration is still being drawn, refresh in a minute to see it.</div>')
+            else:
+                image_html = ''
+
+            body = render_template('article.html',
+                autoescape=True,
+                title=article_data['title'],
+                created_at=article_data['created_at'][:10],
+                image_html=image_html,
+                summary=article_data['summary'],
+                content_html=SafeHtml(''.join(f'<p>{escape(para.strip())}</p>' for para in article_data['content'].split('\n\n') if para.strip())),
+                original_url=article_data['url'],
+                article_id=article_id
+            )
+            page = CachedPage.build(body, _parse_expires_at(article_data.get('expires_at')))
+            # A page with a placeholder changes once the image arrives, so neither we nor browsers keep it
+            if not image_pending:
+                services.page_cache.put(article_id, page)
+
+        response = Response(page.body, mimetype='text/html')
+        response.set_etag(page.etag)
+        if image_pending:
+            response.cache_control.no_cache = True
+        else:
+            response.cache_control.public = True
+            response.cache_control.max_age = page.max_age()
+            response.expires = page.expires_at
 
-        return render_template('article.html',
-            title=article_data['title'],
-            created_at=article_data['created_at'][:10],
-            image_html=f'<img src="{article_data["image_url"]}" alt="Article image" class="image">' if article_data.get('image_url') else '',
-            summary=article_data['summary'],
-            content_html=''.join(f'<p>{para.strip()}</p>' for para in article_data['content'].split('\n\n') if para.strip()),
-            original_url=article_data['url'],
-            article_id=article_id
-        )
+        # Answers 304 Not Modified when If-None-Match carries our ETag
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/images/<article_id>/<filename>')
+def serve_image(article_id: str, filename: str) -> Union[Response, Tuple[Response, int]]:
+    """Mirrored article image variants. Their names never get reused, so browsers may keep them for a year."""
+    if not IMAGE_ID.match(article_id) or not IMAGE_FILENAME.match(filename):
+        return jsonify({"error": "Not found"}), 404
+
+    response = send_from_directory(get_container().image_mirror.directory(article_id), filename, max_age=IMAGE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _parse_expires_at(expires_at: Optional[str]) -> datetime.datetime:
+    try:
+        parsed = datetime.datetime.fromisoformat(expires_at)
+        # Articles are stored with naive timestamps from the (UTC) server clock
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+
+
 @app.route('/article/<article_id>/rate/<int:rating>', methods=['POST'])
 def submit_article_rating(article_id: str, rating: int) -> Union[Response, Tuple[Response, int]]:
     try:
         if rating < 1 or rating > 3:
             return jsonify({"status": "error", "message": "Rating must be between 1 and 3"}), 400
 
-        config = Config()
-        articles_store = ArticlesStore(config)
+        services = get_container()
 
-        article_data = articles_store.get_article(article_id)
+        article_data = services.articles_store.get_article(article_id, 'summary')
         if not article_data:
             return jsonify({"status": "error", "message": "Article not found or expired"}), 404
 
-        def update_preferences_async():
-            try:
-                logger = get_logger()
-                logger.info(f"🔄 Starting async preference update for {rating}-star rating on article")
-
-                ai_service = AIService(config)
-                preferences_store = PreferencesStore(config)
-
-                current_preferences: PreferencesWithEmbeddings = preferences_store.get_preferences_with_embeddings()
-                updated_preferences: PreferencesWithEmbeddings = ai_service.update_preferences_from_rating_with_embeddings(
-                    current_preferences, rating, article_data['summary']
-                )
-
-                if updated_preferences:
-                    success = preferences_store.update_preferences_with_embeddings(updated_preferences)
-                    if success:
-                        logger.info(f"✅ Successfully updated preferences for {rating}-star rating on article")
-                    else:
-                        logger.error(f"❌ Failed to save updated preferences for {rating}-star rating on article")
-                else:
-                    logger.error(f"❌ Failed to update preferences for {rating}-star rating on article")
-            except Exception as background_error:
-                logger = get_logger()
-                logger.error(f"❌ Async preference update failed: {background_error}")
-
-        threading.Thread(target=update_preferences_async, daemon=True).start()
+        # Ratings are applied in order by the worker's single background updater
+        if not services.preference_worker.submit(article_id, rating, article_data['summary']):
+            return jsonify({"status": "error", "message": "Too many pending ratings, please try again later"}), 503
 
         return jsonify({
             "status": "success",
             "message": f"Rated {rating} star(s)! Preferences will be updated.",
-            "rating": rating
+            "rating": rating,
+            "queue_depth": services.preference_worker.queue_depth()
         })
 
     except Exception as e:
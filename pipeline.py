@@ -0,0 +1,95 @@
+import time
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from logger import get_logger
+from typing import Any, Callable, Dict, List, Tuple
+
+
+@dataclass
+class Stage:
+    """A unit of work in a Pipeline.
+
+    `run` is called with the results of the stages it depends on as keyword
+    arguments, and its return value becomes this stage's result under `name`.
+    """
+    name: str
+    run: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+class Pipeline:
+    """Runs a small dependency graph of stages on a bounded thread pool.
+
+    Independent stages run concurrently, so end-to-end latency is bounded by the
+    critical path rather than by the sum of all stages.
+    """
+
+    def __init__(self, name: str, stages: List[Stage], max_workers: int = 4):
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.logger = get_logger()
+        self.timings: Dict[str, float] = {}
+
+        if len(self.stages) != len(stages):
+            raise ValueError(f"Pipeline '{name}' has duplicate stage names")
+        self._validate()
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        # Kahn's algorithm: every stage must become runnable eventually
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Pipeline '{self.name}' has a dependency cycle between {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage and return their results by stage name.
+
+        The first stage to fail cancels all stages that have not started yet, and
+        its exception is re-raised once running stages have finished.
+        """
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running: Dict[Future, str] = {}
+        started_at = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pipeline-{self.name}") as executor:
+            while pending or running:
+                for name in [name for name, stage in pending.items() if all(d in results for d in stage.depends_on)]:
+                    stage = pending.pop(name)
+                    arguments = {dependency: results[dependency] for dependency in stage.depends_on}
+                    running[executor.submit(self._run_stage, stage, arguments)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        self.logger.error(f"❌  Stage '{name}' failed in pipeline '{self.name}'")
+                        raise
+
+        total = time.perf_counter() - started_at
+        summary = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.timings.items())
+        self.logger.info(f"⏱️  Pipeline '{self.name}' finished in {total:.2f}s ({summary})")
+        return results
+
+    def _run_stage(self, stage: Stage, arguments: Dict[str, Any]) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return stage.run(**arguments)
+        finally:
+            self.timings[stage.name] = time.perf_counter() - started_at
+            self.logger.debug(f"⏱️  Stage '{stage.name}' took {self.timings[stage.name]:.2f}s")
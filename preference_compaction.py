@@ -0,0 +1,111 @@
+import time
+import numpy as np
+from dataclasses import dataclass
+from config import Config
+from preference_matrix import PreferenceMatrix
+from typing import List, Optional, Tuple
+
+MIN_SCORE, MAX_SCORE = -5, 5
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass
+class CompactionResult:
+    before: int
+    merged: int = 0   # Preferences folded into a similar representative
+    pruned: int = 0   # Preferences whose score decayed to near zero
+    trimmed: int = 0  # Weakest preferences dropped to stay under the size ceiling
+
+    @property
+    def after(self) -> int:
+        return self.before - self.merged - self.pruned - self.trimmed
+
+    @property
+    def changed(self) -> bool:
+        return self.after != self.before
+
+    def __str__(self) -> str:
+        return f"{self.before} -> {self.after} preferences ({self.merged} merged, {self.pruned} pruned, {self.trimmed} trimmed)"
+
+
+def compact_preferences(preferences: PreferenceMatrix, config: Config, now: Optional[float] = None) -> Tuple[PreferenceMatrix, CompactionResult]:
+    """Return a compacted copy of the preferences.
+
+    1. Decay: scores fade towards zero with a half-life since they were last updated,
+       and preferences that end up near zero are pruned.
+    2. Merge: preferences whose embeddings are at least `preference_merge_threshold`
+       similar, and whose scores have the same sign, are folded into the strongest of
+       them, which takes the sum of their scores (clamped to the score range).
+    3. Trim: if there are still more than `preference_max_count`, the weakest go.
+    """
+    now = round(time.time()) if now is None else now
+    compacted = preferences.copy()
+    result = CompactionResult(before=len(compacted))
+
+    result.pruned = _decay(compacted, now, config.preference_half_life_days, config.preference_prune_below)
+    result.merged = _merge_similar(compacted, config.preference_merge_threshold)
+    result.trimmed = _trim(compacted, config.preference_max_count)
+
+    return compacted, result
+
+
+def _decay(preferences: PreferenceMatrix, now: float, half_life_days: float, prune_below: float) -> int:
+    if half_life_days <= 0:
+        return 0
+
+    # Unknown update times start the clock now rather than decaying from the epoch
+    updated_at = np.where(preferences.updated_at > 0, preferences.updated_at, now)
+    factors = 0.5 ** (np.maximum(now - updated_at, 0) / (half_life_days * SECONDS_PER_DAY))
+
+    # Decayed scores are brought up to date as of now, so the next run only decays the time since
+    for keyword, score, factor in zip(preferences.keywords, preferences.scores.copy(), factors):
+        if factor < 1 or preferences.get_updated_at(keyword) == 0:
+            preferences.set_score(keyword, float(score * factor), now)
+
+    faded = [keyword for keyword, score in zip(preferences.keywords, preferences.scores) if abs(score) < prune_below]
+    preferences.remove(faded)
+    return len(faded)
+
+
+def _merge_similar(preferences: PreferenceMatrix, threshold: float) -> int:
+    if threshold >= 1 or len(preferences) < 2:
+        return 0
+
+    # Strongest preferences become representatives first, and absorb their near-duplicates
+    order = np.argsort(-np.abs(preferences.scores), kind="stable")
+    absorbed = set()
+    merged: List[str] = []
+
+    for keyword in [preferences.keywords[row] for row in order]:
+        if keyword in absorbed or not preferences.has_embedding(keyword):
+            continue
+
+        score = preferences.get_score(keyword)
+        cluster = [
+            other for other, _ in preferences.search_threshold(preferences.get_embedding(keyword), threshold)
+            if other != keyword and other not in absorbed and np.sign(preferences.get_score(other)) == np.sign(score)
+        ]
+        if not cluster:
+            continue
+
+        combined = score + sum(preferences.get_score(other) for other in cluster)
+        updated_at = max(preferences.get_updated_at(other) for other in [keyword, *cluster])
+        preferences.set_score(keyword, min(MAX_SCORE, max(MIN_SCORE, combined)), updated_at)
+
+        absorbed.add(keyword)
+        absorbed.update(cluster)
+        merged.extend(cluster)
+
+    preferences.remove(merged)
+    return len(merged)
+
+
+def _trim(preferences: PreferenceMatrix, max_count: int) -> int:
+    excess = len(preferences) - max_count
+    if max_count <= 0 or excess <= 0:
+        return 0
+
+    # Weakest first, and the least recently updated among equally weak ones
+    order = np.lexsort((preferences.updated_at, np.abs(preferences.scores)))
+    preferences.remove([preferences.keywords[row] for row in order[:excess]])
+    return excess
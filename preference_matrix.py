@@ -0,0 +1,311 @@
+import time
+import numpy as np
+from _types import PreferencesWithEmbeddings
+from config import Config
+from vector_index import VectorIndex, VECTOR_INDEXES, build_index, normalize, top_k, above_threshold
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+
+DEFAULT_DIMENSIONS = 1536
+VECTOR_INDEX_BACKEND = Config.preference_index
+VECTOR_INDEX_MIN_SIZE = Config.preference_index_min_size  # Below this a scan of the matrix is fast enough
+
+
+def configure_vector_index(backend: str, min_size: int) -> None:
+    """Choose the index nearest-neighbour lookups use on large preference sets"""
+    global VECTOR_INDEX_BACKEND, VECTOR_INDEX_MIN_SIZE
+    if backend not in VECTOR_INDEXES:
+        raise ValueError(f"Unknown preference index '{backend}', expected one of {sorted(VECTOR_INDEXES)}")
+    VECTOR_INDEX_BACKEND, VECTOR_INDEX_MIN_SIZE = backend, min_size
+
+
+class PreferenceRow(MutableMapping):
+    """Dict-like view of a single preference, writing changes back to its matrix"""
+
+    def __init__(self, matrix: 'PreferenceMatrix', keyword: str):
+        self._matrix = matrix
+        self._keyword = keyword
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "score":
+            return self._matrix.get_score(self._keyword)
+        if key == "embedding":
+            return self._matrix.get_embedding(self._keyword).tolist()
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "score":
+            self._matrix.set_score(self._keyword, value)
+        elif key == "embedding":
+            self._matrix.set_embedding(self._keyword, value)
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Preference fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("score", "embedding"))
+
+    def __len__(self) -> int:
+        return 2
+
+
+class PreferenceMatrix(MutableMapping):
+    """Preferences stored as a pre-normalized float32 embedding matrix.
+
+    Row i holds the unit-length embedding of keywords[i], scores[i] its score, and
+    updated_at[i] when that score last changed (whole epoch seconds, 0 if unknown).
+    Behaves like the PreferencesWithEmbeddings dict (keyword -> {"score", "embedding"})
+    so existing callers keep working, while similarity work becomes a single
+    matrix-vector or matrix-matrix product.
+
+    Nearest-neighbour lookups (search, search_threshold) scan the matrix for small
+    preference sets. Once there are VECTOR_INDEX_MIN_SIZE preferences or more they go
+    through the configured index (exact, or approximate IVF), built on first use and
+    kept in sync with add/remove.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+        self.keywords: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._embeddings = np.zeros((0, dimensions), dtype=np.float32)
+        self._scores = np.zeros(0, dtype=np.float64)
+        self._updated_at = np.zeros(0, dtype=np.float64)
+        self._vector_index: Optional[VectorIndex] = None
+
+    @classmethod
+    def from_dict(cls, preferences: Optional[Mapping]) -> 'PreferenceMatrix':
+        preferences = preferences or {}
+        dimensions = DEFAULT_DIMENSIONS
+        for data in preferences.values():
+            if isinstance(data, Mapping) and data.get("embedding"):
+                dimensions = len(data["embedding"])
+                break
+
+        matrix = cls(dimensions)
+        keywords = list(preferences.keys())
+        embeddings = np.zeros((len(keywords), dimensions), dtype=np.float32)
+        scores = np.zeros(len(keywords), dtype=np.float64)
+
+        for i, keyword in enumerate(keywords):
+            data = preferences[keyword]
+            if isinstance(data, Mapping):
+                scores[i] = data.get("score", 0)
+                if data.get("embedding"):
+                    embeddings[i] = data["embedding"]
+            else:
+                # Legacy score-only preference; embedding stays zero until filled in
+                scores[i] = data
+
+        matrix.keywords = keywords
+        matrix._index = {keyword: i for i, keyword in enumerate(keywords)}
+        matrix._embeddings = normalize(embeddings)
+        matrix._scores = scores
+        matrix._updated_at = np.zeros(len(keywords), dtype=np.float64)
+        return matrix
+
+    @classmethod
+    def from_arrays(cls, keywords: Sequence[str], embeddings: np.ndarray, scores: Sequence[float], updated_at: Optional[Sequence[float]] = None) -> 'PreferenceMatrix':
+        """Build from an (n x dimensions) embedding matrix, n scores and optionally n update times"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        matrix = cls(embeddings.shape[1])
+        matrix.keywords = list(keywords)
+        matrix._index = {keyword: i for i, keyword in enumerate(matrix.keywords)}
+        matrix._embeddings = normalize(embeddings)
+        matrix._scores = np.asarray(scores, dtype=np.float64)
+        matrix._updated_at = np.zeros(len(matrix.keywords), dtype=np.float64) if updated_at is None else np.asarray(updated_at, dtype=np.float64)
+        return matrix
+
+    @classmethod
+    def ensure(cls, preferences: Union['PreferenceMatrix', Mapping, None]) -> 'PreferenceMatrix':
+        if isinstance(preferences, PreferenceMatrix):
+            return preferences
+        return cls.from_dict(preferences)
+
+    def to_dict(self) -> PreferencesWithEmbeddings:
+        """Serialize back to the stored JSON shape"""
+        return {
+            keyword: {
+                "score": self._json_score(self._scores[i]),
+                "embedding": self._embeddings[i].tolist()
+            }
+            for i, keyword in enumerate(self.keywords)
+        }
+
+    def copy(self) -> 'PreferenceMatrix':
+        matrix = PreferenceMatrix(self.dimensions)
+        matrix.keywords = list(self.keywords)
+        matrix._index = dict(self._index)
+        matrix._embeddings = self._embeddings.copy()
+        matrix._scores = self._scores.copy()
+        matrix._updated_at = self._updated_at.copy()
+        matrix._vector_index = self._vector_index.copy() if self._vector_index is not None else None
+        return matrix
+
+    # # # # # # # # # # # # MAPPING API # # # # # # # # # # # #
+
+    def __getitem__(self, keyword: str) -> PreferenceRow:
+        if keyword not in self._index:
+            raise KeyError(keyword)
+        return PreferenceRow(self, keyword)
+
+    def __setitem__(self, keyword: str, value: Mapping) -> None:
+        self.add(keyword, value.get("score", 0), value.get("embedding"))
+
+    def __delitem__(self, keyword: str) -> None:
+        self.remove([keyword])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.keywords))
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def __contains__(self, keyword: object) -> bool:
+        return keyword in self._index
+
+    # # # # # # # # # # # # ROW ACCESS # # # # # # # # # # # #
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Read-only (n x dimensions) matrix of unit-length embeddings"""
+        view = self._embeddings.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def scores(self) -> np.ndarray:
+        view = self._scores.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def updated_at(self) -> np.ndarray:
+        view = self._updated_at.view()
+        view.flags.writeable = False
+        return view
+
+    def row(self, keyword: str) -> int:
+        return self._index[keyword]
+
+    def get_score(self, keyword: str) -> Union[int, float]:
+        return self._json_score(self._scores[self._index[keyword]])
+
+    def set_score(self, keyword: str, score: float, updated_at: Optional[float] = None) -> None:
+        """Set a score, stamping the row as updated now unless a time is given"""
+        row = self._index[keyword]
+        self._scores[row] = score
+        self._updated_at[row] = round(time.time()) if updated_at is None else updated_at
+
+    def get_updated_at(self, keyword: str) -> float:
+        return float(self._updated_at[self._index[keyword]])
+
+    def get_embedding(self, keyword: str) -> np.ndarray:
+        return self._embeddings[self._index[keyword]]
+
+    def set_embedding(self, keyword: str, embedding: Sequence[float]) -> None:
+        row = self._index[keyword]
+        self._embeddings[row] = normalize(np.asarray(embedding, dtype=np.float32))
+        if self._vector_index is not None:
+            self._vector_index.add(keyword, self._embeddings[row])
+
+    def has_embedding(self, keyword: str) -> bool:
+        return bool(np.any(self._embeddings[self._index[keyword]]))
+
+    def add(self, keyword: str, score: float, embedding: Optional[Sequence[float]], updated_at: Optional[float] = None) -> None:
+        if not self.keywords and embedding is not None and len(embedding) > 0:
+            # An empty matrix takes its dimensions from the first embedding
+            self.dimensions = len(embedding)
+            self._embeddings = np.zeros((0, self.dimensions), dtype=np.float32)
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if embedding is not None and len(embedding) > 0:
+            vector = normalize(np.asarray(embedding, dtype=np.float32))
+
+        if self._vector_index is not None:
+            self._vector_index.add(keyword, vector)
+
+        updated_at = round(time.time()) if updated_at is None else updated_at
+
+        if keyword in self._index:
+            row = self._index[keyword]
+            self._embeddings[row] = vector
+            self._scores[row] = score
+            self._updated_at[row] = updated_at
+            return
+
+        self._index[keyword] = len(self.keywords)
+        self.keywords.append(keyword)
+        self._embeddings = np.vstack([self._embeddings, vector[np.newaxis, :]])
+        self._scores = np.append(self._scores, score)
+        self._updated_at = np.append(self._updated_at, updated_at)
+
+    def remove(self, keywords: Sequence[str]) -> None:
+        rows = [self._index[keyword] for keyword in keywords if keyword in self._index]
+        if not rows:
+            return
+
+        if self._vector_index is not None:
+            for row in rows:
+                self._vector_index.remove(self.keywords[row])
+
+        keep = np.ones(len(self.keywords), dtype=bool)
+        keep[rows] = False
+        self.keywords = [keyword for keyword, kept in zip(self.keywords, keep) if kept]
+        self._index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._embeddings = self._embeddings[keep]
+        self._scores = self._scores[keep]
+        self._updated_at = self._updated_at[keep]
+
+    # # # # # # # # # # # # SIMILARITY # # # # # # # # # # # #
+
+    def similarities(self, vector: Sequence[float]) -> np.ndarray:
+        """Cosine similarity of one vector against every preference, shape (n,)"""
+        query = normalize(np.asarray(vector, dtype=np.float32))
+        return np.clip(self._embeddings @ query, -1.0, 1.0)
+
+    def similarity_matrix(self, vectors: Union[np.ndarray, Sequence[Sequence[float]]]) -> np.ndarray:
+        """Cosine similarity of many vectors against every preference, shape (m, n)"""
+        queries = normalize(np.asarray(vectors, dtype=np.float32))
+        return np.clip(queries @ self._embeddings.T, -1.0, 1.0)
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """The k preferences most similar to vector as (keyword, similarity), best first"""
+        index = self._lookup_index()
+        if index is not None:
+            return index.search(vector, k)
+
+        similarities = self.similarities(vector)
+        return [(self.keywords[row], float(similarities[row])) for row in top_k(similarities, k)]
+
+    def search_threshold(self, vector: Sequence[float], threshold: float) -> List[Tuple[str, float]]:
+        """Preferences more similar to vector than threshold as (keyword, similarity), best first"""
+        index = self._lookup_index()
+        if index is not None:
+            return index.search_threshold(vector, threshold)
+
+        similarities = self.similarities(vector)
+        return [(self.keywords[row], float(similarities[row])) for row in above_threshold(similarities, threshold)]
+
+    def _lookup_index(self) -> Optional[VectorIndex]:
+        if len(self.keywords) < VECTOR_INDEX_MIN_SIZE:
+            self._vector_index = None
+            return None
+
+        if not isinstance(self._vector_index, VECTOR_INDEXES[VECTOR_INDEX_BACKEND]):
+            self._vector_index = build_index(VECTOR_INDEX_BACKEND, self.keywords, self._embeddings)
+
+        return self._vector_index
+
+    def weighted_scores(self, vectors: Union[np.ndarray, Sequence[Sequence[float]]]) -> np.ndarray:
+        """Sum of similarity x preference score for each vector, shape (m,)"""
+        if len(self.keywords) == 0:
+            return np.zeros(len(vectors), dtype=np.float64)
+        return self.similarity_matrix(vectors) @ self._scores
+
+    @staticmethod
+    def _json_score(score: float) -> Union[int, float]:
+        score = float(score)
+        return int(score) if score.is_integer() else score
@@ -0,0 +1,208 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+from logger import get_logger
+from services import AIService
+from stores import PreferencesStore
+from preference_compaction import CompactionResult, compact_preferences
+from typing import Any, Dict, List, Optional
+
+MAX_UPDATE_ATTEMPTS = 3
+
+
+@dataclass
+class RatingUpdate:
+    article_id: str
+    rating: int
+    summary: str
+    submitted_at: float = field(default_factory=time.time)
+
+
+class PreferenceUpdateWorker:
+    """Applies article ratings to the preferences from a single background thread.
+
+    Ratings are queued, and every pass drains whatever is pending: preferences are
+    loaded once, all queued ratings are applied in order, and a single new version
+    is persisted. Ratings therefore never race each other within a worker process.
+
+    The same thread compacts the preferences every `preference_compaction_interval`
+    seconds (merging near-duplicates, decaying stale ones), and straight away
+    whenever ratings push them past `preference_max_count`.
+    """
+
+    def __init__(self, ai_service: AIService, preferences_store: PreferencesStore, max_queue_size: int = 100):
+        self.ai_service = ai_service
+        self.preferences_store = preferences_store
+        self.config = preferences_store.config
+        self.logger = get_logger()
+
+        self._queue: 'queue.Queue[Optional[RatingUpdate]]' = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.applied = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_seconds: Optional[float] = None
+        self.max_lag_seconds = 0.0
+        self._total_lag_seconds = 0.0
+
+        self.compactions = 0
+        self.last_compaction: Optional[str] = None
+        self._next_compaction = time.time() + self.config.preference_compaction_interval
+
+    def submit(self, article_id: str, rating: int, summary: str) -> bool:
+        """Queue a rating. Returns False if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(RatingUpdate(article_id, rating, summary))
+            return True
+        except queue.Full:
+            self.logger.warning(f"⚠️  Preference update queue is full ({self._queue.maxsize}), dropping {rating}-star rating")
+            return False
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "applied": self.applied,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "avg_lag_seconds": self._total_lag_seconds / self.applied if self.applied else None,
+            "compactions": self.compactions,
+            "last_compaction": self.last_compaction,
+        }
+
+    def start(self) -> None:
+        """Start the thread ahead of the first rating, so scheduled compaction runs"""
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="preference-updates", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Finish the queued ratings and stop the thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                update = self._queue.get(timeout=self._seconds_until_compaction())
+            except queue.Empty:
+                self._compact()
+                continue
+            if update is None:
+                return
+
+            batch = [update]
+            stopping = False
+            while True:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+
+            self._apply(batch)
+            if stopping:
+                return
+            if self._seconds_until_compaction() == 0:
+                self._compact()
+
+    def _seconds_until_compaction(self) -> Optional[float]:
+        if self.config.preference_compaction_interval <= 0:
+            return None  # Scheduled compaction is disabled
+        return max(0.0, self._next_compaction - time.time())
+
+    def _apply(self, batch: List[RatingUpdate]) -> None:
+        ratings = ", ".join(f"{update.rating}-star" for update in batch)
+        self.logger.info(f"🔄 Applying {len(batch)} queued rating(s) to preferences: {ratings}")
+
+        try:
+            for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+                version, preferences = self.preferences_store.get_preferences_with_version()
+                for update in batch:
+                    preferences = self.ai_service.update_preferences_from_rating_with_embeddings(
+                        preferences, update.rating, update.summary
+                    )
+
+                if not preferences:
+                    raise ValueError("preference update produced no preferences")
+
+                # Keep the per-trigger scoring cost bounded without waiting for the next scheduled run
+                compaction: Optional[CompactionResult] = None
+                if len(preferences) > self.config.preference_max_count:
+                    preferences, compaction = compact_preferences(preferences, self.config)
+
+                # Only lands if nobody else wrote since we read; otherwise re-apply on the fresh version
+                if self.preferences_store.update_if_version(version, preferences, snapshot=compaction is not None):
+                    if compaction is not None:
+                        self._record_compaction(compaction)
+                    break
+
+                self.logger.warning(f"⚠️  Preferences changed while applying ratings, retrying (attempt {attempt}/{MAX_UPDATE_ATTEMPTS})")
+            else:
+                raise ValueError(f"preferences kept changing underneath us after {MAX_UPDATE_ATTEMPTS} attempts")
+
+        except Exception as e:
+            self.failed += len(batch)
+            self.logger.error(f"❌ Failed to apply {len(batch)} queued rating(s): {e}")
+            return
+
+        now = time.time()
+        lags = [now - update.submitted_at for update in batch]
+        self.applied += len(batch)
+        self.batches += 1
+        self.last_lag_seconds = lags[-1]
+        self.max_lag_seconds = max(self.max_lag_seconds, *lags)
+        self._total_lag_seconds += sum(lags)
+
+        self.logger.info(f"✅ Applied {len(batch)} rating(s) in one preferences version (max lag {max(lags):.2f}s)")
+
+    def _compact(self) -> None:
+        self._next_compaction = time.time() + self.config.preference_compaction_interval
+        self.logger.info("🧹 Compacting preferences...")
+
+        try:
+            for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+                version, preferences = self.preferences_store.get_preferences_with_version()
+                if version == 0:
+                    self.logger.info("🤷  No stored preferences to compact yet")
+                    return
+
+                compacted, result = compact_preferences(preferences, self.config)
+
+                # Decay alone only changes scores, which a delta stores without the embeddings.
+                # Once rows were merged, pruned or trimmed, a fresh snapshot is worth writing.
+                if self.preferences_store.update_if_version(version, compacted, snapshot=result.changed):
+                    self._record_compaction(result)
+                    return
+
+                self.logger.warning(f"⚠️  Preferences changed while compacting, retrying (attempt {attempt}/{MAX_UPDATE_ATTEMPTS})")
+
+            self.logger.error(f"❌ Gave up compacting preferences after {MAX_UPDATE_ATTEMPTS} version conflicts")
+
+        except Exception as e:
+            self.logger.error(f"❌ Failed to compact preferences: {e}")
+
+    def _record_compaction(self, result: CompactionResult) -> None:
+        self.compactions += 1
+        self.last_compaction = str(result)
+        self.logger.info(f"✅ Compacted preferences: {result}")
@@ -15,8 +15,44 @@ if __name__ == "__main__":
 
     # Run the embedding tests
     from tests.test_embeddings import test_embeddings
+    from tests.test_preference_matrix import test_preference_matrix
+    from tests.test_preferences_store import test_preferences_store
+    from tests.test_vector_index import test_vector_index
+    from tests.test_preference_compaction import test_preference_compaction
+    from tests.test_near_duplicates import test_near_duplicates
+    from tests.test_news_api_service import test_news_api_service
+    from tests.test_seen_urls import test_seen_urls
+    from tests.test_extraction_cache import test_extraction_cache
+    from tests.test_completion_cache import test_completion_cache
+    from tests.test_image_backfill import test_image_backfill
+    from tests.test_image_mirror import test_image_mirror
+    from tests.test_pipeline import test_pipeline
+    from tests.test_templates import test_templates
+    from tests.test_page_cache import test_page_cache
+    from tests.test_embedding_cache import test_embedding_cache
+    from tests.test_embedding_codec import test_embedding_codec
+    from tests.test_preference_worker import test_preference_worker
+    from tests.test_http_session import test_http_session
 
     try:
+        test_preference_matrix()
+        test_preferences_store()
+        test_vector_index()
+        test_preference_compaction()
+        test_near_duplicates()
+        test_news_api_service()
+        test_seen_urls()
+        test_extraction_cache()
+        test_completion_cache()
+        test_image_backfill()
+        test_image_mirror()
+        test_pipeline()
+        test_templates()
+        test_page_cache()
+        test_embedding_cache()
+        test_embedding_codec()
+        test_preference_worker()
+        test_http_session()
         test_embeddings()
         print("\n✅  All tests completed successfully!")
     except Exception as e:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark preference lookups with the exact and IVF vector indexes
+Uses synthetic clustered embeddings, so no API keys are needed
+
+Usage: python -m scripts.benchmark_vector_index [preferences] [dimensions]
+"""
+
+import sys
+import time
+import numpy as np
+from vector_index import BruteForceIndex, IVFIndex, normalize
+
+QUERIES = 200
+TOP_K = 10
+
+def synthetic_embeddings(count: int, dimensions: int, topics: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors scattered around random topics, standing in for keyword embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimensions)).astype(np.float32)
+    embeddings = np.empty((count, dimensions), dtype=np.float32)
+
+    # Built in chunks to keep the temporaries small at 100k x 1536
+    for start in range(0, count, 10000):
+        end = min(count, start + 10000)
+        noise = rng.standard_normal((end - start, dimensions)).astype(np.float32)
+        embeddings[start:end] = centers[rng.integers(0, topics, end - start)] + 0.5 * noise
+
+    return normalize(embeddings)
+
+def time_queries(index, queries: np.ndarray, search) -> np.ndarray:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(index, query)
+        timings.append(time.perf_counter() - started)
+    return np.array(timings) * 1000
+
+def benchmark_vector_index(count: int = 100_000, dimensions: int = 1536) -> None:
+    print(f"🔧 Benchmarking vector indexes with {count:,} preferences x {dimensions} dimensions...")
+
+    embeddings = synthetic_embeddings(count, dimensions, topics=max(1, count // 100))
+    keys = [f"keyword-{i}" for i in range(count)]
+    rng = np.random.default_rng(1)
+    queries = normalize(embeddings[rng.choice(count, QUERIES, replace=False)] + 0.1 * rng.standard_normal((QUERIES, dimensions)).astype(np.float32))
+
+    exact = BruteForceIndex(dimensions)
+    started = time.perf_counter()
+    exact.add_many(keys, embeddings)
+    print(f"  - exact index built in {time.perf_counter() - started:.2f}s")
+
+    ivf = IVFIndex(dimensions)
+    started = time.perf_counter()
+    ivf.add_many(keys, embeddings)
+    ivf.train()
+    print(f"  - IVF index built in {time.perf_counter() - started:.2f}s ({ivf.list_count} lists, nprobe {ivf.nprobe})")
+
+    truth = [{key for key, _ in exact.search(query, TOP_K)} for query in queries]
+    found = [{key for key, _ in ivf.search(query, TOP_K)} for query in queries]
+    recall = np.mean([len(t & f) / TOP_K for t, f in zip(truth, found)])
+
+    print(f"\n{'index':<8} {'query':<10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, index in (("exact", exact), ("ivf", ivf)):
+        for kind, search in (("top-k", lambda i, q: i.search(q, TOP_K)), ("threshold", lambda i, q: i.search_threshold(q, 0.7))):
+            timings = time_queries(index, queries, search)
+            print(f"{name:<8} {kind:<10} {np.percentile(timings, 50):>8.3f} {np.percentile(timings, 99):>8.3f}")
+
+    timings = []
+    for i in range(QUERIES):
+        started = time.perf_counter()
+        ivf.remove(keys[i])
+        ivf.add(keys[i], embeddings[i])
+        timings.append(time.perf_counter() - started)
+    print(f"ivf      delete+insert {np.percentile(np.array(timings) * 1000, 50):>5.3f}")
+
+    print(f"\n✅ IVF recall@{TOP_K}: {recall:.3f}")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    benchmark_vector_index(*args)
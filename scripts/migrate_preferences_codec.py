@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script to migrate stored preferences from JSON float lists to the packed embedding format
+Rows that are already packed are left alone, so it is safe to run more than once
+"""
+
+import sys
+import json
+from config import Config
+from supabase import create_client
+from embedding_codec import encode_preferences, decode_preferences, is_packed_preferences, is_preferences_delta
+
+def migrate_preferences_codec(dry_run: bool = False) -> int:
+    """Re-encode every legacy preferences row in place, keeping versions and is_latest untouched"""
+
+    config = Config()
+    dtype = config.preferences_embedding_dtype
+    supabase = create_client(config.supabase_url, config.supabase_key)
+
+    print(f"🔧 Migrating preferences to packed {dtype} embeddings{' (dry run)' if dry_run else ''}...")
+
+    versions = supabase.table('preferences').select('version').order('version').execute().data or []
+    migrated = 0
+
+    # One row at a time, so we never hold every legacy version in memory at once
+    for row in versions:
+        version = row['version']
+        stored = supabase.table('preferences').select('preferences').eq('version', version).execute().data[0]['preferences']
+
+        if is_packed_preferences(stored) or is_preferences_delta(stored):
+            print(f"  - version {version}: already packed, skipping")
+            continue
+
+        encoded = encode_preferences(decode_preferences(stored), dtype)
+        before, after = len(json.dumps(stored)), len(json.dumps(encoded))
+        print(f"  - version {version}: {len(encoded['keywords'])} preferences, {before:,} -> {after:,} bytes")
+
+        if not dry_run:
+            supabase.table('preferences').update({'preferences': encoded}).eq('version', version).execute()
+        migrated += 1
+
+    print(f"✅ Migrated {migrated} of {len(versions)} preference versions")
+    return migrated
+
+if __name__ == "__main__":
+    migrate_preferences_codec(dry_run="--dry-run" in sys.argv)
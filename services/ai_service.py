@@ -1,10 +1,18 @@
-import openai
+import os
 import json
+import logging
+import openai
 import numpy as np
 from config import Config
+from caches import EmbeddingCache, ResponseCache
 from logger import get_logger
 from _types import PreferencesWithEmbeddings
-from typing import List, Dict, Optional, Any
+from preference_matrix import PreferenceMatrix
+from typing import List, Dict, Iterable, Iterator, Optional, Any, Callable, Sequence
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+EMBEDDING_BATCH_SIZE = 100  # Inputs per embeddings request
 
 # # # # # # # # # # # # PROMPTS # # # # # # # # # # # #
 
@@ -52,39 +60,104 @@ Content: Generic news reading scene with newspapers, coffee, and reading glasses
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
 class AIService:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, client: Optional[openai.OpenAI] = None):
         self.config = config
-        self.client = openai.OpenAI(api_key=config.openai_api_key)
+        self.client = client or openai.OpenAI(api_key=config.openai_api_key)
         self.logger = get_logger()
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(config.data_dir, "embeddings.sqlite3"),
+            config.embedding_cache_max_entries
+        )
+        self.completion_cache = ResponseCache(
+            os.path.join(config.data_dir, "completions.sqlite3"),
+            config.completion_cache_max_entries,
+            config.completion_cache_ttl,
+            name="completion"
+        )
 
-
-    def generate_subject_line(self, article_title: str, summary: str) -> str:
-        response = self.client.chat.completions.create(
-            model=self.config.openai_model,
-            messages=[
+    def generate_subject_line(self, article_title: str, summary: str, use_cache: bool = True) -> str:
+        return self._complete(
+            [
                 {"role": "system", "content": EMAIL_SUBJECT_LINE_PROMPT},
                 {"role": "user", "content": f"Title: {article_title}\nSummary: {summary}"}
             ],
             max_tokens=45,
             temperature=0.7,
+            function_name="generate_subject_line",
+            use_cache=use_cache,
         )
-        return self._parse_response(response, "generate_subject_line")
 
-    def summarize_article(self, article_content: str) -> str:
+    def summarize_article(self, article_content: str, use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Summarize an article. With `on_token`, the completion is streamed and each piece of text is passed to it as it arrives."""
         if not article_content:
             self.logger.warning("❌  No content to summarize")
             return ""
 
-        response = self.client.chat.completions.create(
-            model=self.config.openai_model,
-            messages=[
+        return self._complete(
+            [
                 {"role": "system", "content": ARTICLE_SUMMARY_PROMPT},
                 {"role": "user", "content": article_content}
             ],
             max_tokens=400,
             temperature=0.3,
+            function_name="summarize_article",
+            use_cache=use_cache,
+            on_token=on_token,
+        )
+
+    def _complete(self, messages: Sequence[Dict[str, str]], max_tokens: int, temperature: float, function_name: str, use_cache: bool = True,
+                  on_token: Optional[Callable[[str], None]] = None, cache_key: Optional[str] = None) -> str:
+        """Chat completion text, reused from the completion cache for an identical model, prompt and parameters.
+
+        Callers whose prompt varies in ways that don't matter can pass their own
+        `cache_key` instead. With `on_token` the completion is streamed, and every
+        piece of text is passed to it as it arrives. A cached completion is passed
+        as a single piece.
+        """
+        key = cache_key or ResponseCache.make_key(self.config.openai_model, json.dumps(messages, sort_keys=True), max_tokens, temperature)
+
+        if use_cache:
+            cached = self.completion_cache.get(key)
+            if cached is not None:
+                # stats() queries SQLite, so only pay for it when debug logging is on
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"  Completion cache hit in <{function_name}> ({self.completion_cache.stats()})")
+                if on_token is not None:
+                    on_token(cached.value)
+                return cached.value
+
+        if on_token is not None:
+            text = self._stream_completion(messages, max_tokens, temperature, on_token)
+        else:
+            response = self.client.chat.completions.create(
+                model=self.config.openai_model,
+                messages=list(messages),
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            text = self._parse_response(response, function_name)
+
+        # Empty text means the call went wrong, so it's worth retrying next time
+        if text:
+            self.completion_cache.put(key, text)
+        return text
+
+    def _stream_completion(self, messages: Sequence[Dict[str, str]], max_tokens: int, temperature: float, on_token: Callable[[str], None]) -> str:
+        stream = self.client.chat.completions.create(
+            model=self.config.openai_model,
+            messages=list(messages),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
         )
-        return self._parse_response(response, "summarize_article")
+
+        pieces: List[str] = []
+        for chunk in stream:
+            piece = chunk.choices[0].delta.content if chunk.choices else None
+            if piece:
+                pieces.append(piece)
+                on_token(piece)
+        return "".join(pieces).strip()
 
     def generate_image(self, article_title: str, summary: str) -> str:
         def _generate_with_prompt(prompt: str) -> str:
@@ -131,47 +204,70 @@ class AIService:
         return ""
 
 
-    def select_best_article_with_embeddings(self, articles: List[Dict], preferences_with_embeddings: PreferencesWithEmbeddings) -> Optional[Dict]:
-        """Select best article using embedding-based similarity"""
-        if not articles or len(articles) == 0:
-            return None
+    def select_top_articles_with_embeddings(self, articles: Iterable[Dict], preferences_with_embeddings: PreferencesWithEmbeddings, k: int) -> List[Dict]:
+        """Rank articles by embedding-based similarity and return the best k, best first.
+
+        Articles may be a stream: they are embedded and scored one embedding batch at a
+        time as they arrive, and ranked once the stream is exhausted.
+        """
+        preferences = PreferenceMatrix.ensure(preferences_with_embeddings)
 
-        self.logger.info(f"🔍 Selecting best article using embeddings from {len(articles)} articles")
+        received: List[Dict] = []
+        scored: List[Dict] = []
+        preference_scores: List[float] = []
 
-        best_article = articles[0]  # Always have a fallback
-        best_score = float('-inf')  # Start with lowest possible score
+        for batch in self._batched(articles, EMBEDDING_BATCH_SIZE):
+            received.extend(batch)
+            article_texts = [f"Title: {article['title']}\nDescription: {article['description']}" for article in batch]
+            article_embeddings = self.get_embeddings(article_texts)
 
-        for article in articles:
-            # Create text representation of article
-            article_text = f"Title: {article['title']}\nDescription: {article['description']}"
+            embedded = [(article, embedding) for article, embedding in zip(batch, article_embeddings) if embedding is not None]
+            if embedded:
+                # Sum of (article x preference) similarities, weighted by the user's preference scores
+                scored.extend(article for article, _ in embedded)
+                preference_scores.extend(preferences.weighted_scores([embedding for _, embedding in embedded]))
 
-            # Get embedding for this article
-            article_embedding = self.get_embedding(article_text)
+        if not received:
+            return []
 
-            # Calculate total preference score
-            total_score = 0
-            for pref_name, pref_data in preferences_with_embeddings.items():
-                # Calculate similarity between article and this preference
-                similarity = self.cosine_similarity(article_embedding, pref_data["embedding"])
+        self.logger.info(f"🔍 Selecting top {k} articles using embeddings from {len(received)} articles")
 
-                # Weight by user's preference score (1-5)
-                weighted_score = similarity * pref_data["score"]
-                total_score += weighted_score
+        if not scored:
+            self.logger.warning("⚠️  No article embeddings available, falling back to the first articles")
+            return received[:k]
 
-                self.logger.debug(f"  {pref_name}: similarity={similarity:.3f}, score={pref_data['score']}, weighted={weighted_score:.3f}")
+        # Stories many outlets ran get a small boost per doubling of their near-duplicate count.
+        # Read at the end, since a streamed story's count keeps growing until the stream is done.
+        cluster_sizes = np.array([article.get('cluster_size', 1) for article in scored], dtype=np.float64)
+        total_scores = np.array(preference_scores) + self.config.story_cluster_boost * np.log2(np.maximum(cluster_sizes, 1))
 
+        for article, total_score in zip(scored, total_scores):
             self.logger.debug(f"  Article '{article['title'][:50]}...': total_score={total_score:.3f}")
 
-            if total_score > best_score:
-                best_score = total_score
-                best_article = article
+        # Stable sort keeps the original (arrival) order between equal scores
+        ranking = np.argsort(-total_scores, kind='stable')[:k]
+        top_articles = [scored[position] for position in ranking]
 
-        self.logger.info(f"✅ Selected article with embeddings: {best_article['title']} (score: {best_score:.3f})")
-        return best_article
+        for rank, position in enumerate(ranking, start=1):
+            self.logger.info(f"✅ #{rank} article with embeddings: {scored[position]['title']} (score: {total_scores[position]:.3f})")
 
-    def update_preferences_from_rating_with_embeddings(self, current_preferences: PreferencesWithEmbeddings, rating: int, article_summary: str) -> PreferencesWithEmbeddings:
+        return top_articles
+
+    @staticmethod
+    def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+        batch: List[Any] = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def update_preferences_from_rating_with_embeddings(self, current_preferences: PreferencesWithEmbeddings, rating: int, article_summary: str) -> PreferenceMatrix:
         try:
-            current_prefs = current_preferences or {}
+            current_prefs = PreferenceMatrix.ensure(current_preferences)
+            self._fill_missing_embeddings(current_prefs)
 
             article_summary_embedding = self.get_embedding(article_summary)
 
@@ -184,7 +280,7 @@ class AIService:
 
             if not extracted_keywords_from_article:
                 self.logger.warning("❌  No valid keywords extracted from article summary. Aborting update!")
-                return current_preferences
+                return current_prefs
 
             updated_prefs = self._update_preferences_based_on_embeddings_and_keywords(
                 current_prefs,
@@ -201,22 +297,28 @@ class AIService:
 
         except Exception as e:
             self.logger.error(f"❌ Error updating preferences from rating with embeddings: {e}")
-            return current_preferences or {}
+            return PreferenceMatrix.ensure(current_preferences)
+
+    def _extract_relevant_keywords_from_text(self, text: str, current_keywords: List[str], use_cache: bool = True) -> List[str]:
+        # The current keywords are only examples of the preferred style, and they grow with every
+        # rating, so the cache is keyed on the summary alone and repeat ratings of it hit the cache
+        max_tokens, temperature = 100, 0.3
+        cache_key = ResponseCache.make_key(self.config.openai_model, "extract_keywords", KEYWORD_EXTRACTION_PROMPT, text, max_tokens, temperature)
 
-    def _extract_relevant_keywords_from_text(self, text: str, current_keywords: List[str]) -> List[str]:
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=[
+            keywords_text = self._complete(
+                [
                     {"role": "system", "content": KEYWORD_EXTRACTION_PROMPT.format(current_keywords=", ".join(current_keywords))},
                     {"role": "user", "content": f"Extract keywords from this article summary: {text}"}
                 ],
-                max_tokens=100,
-                temperature=0.3,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                function_name="extract_keywords",
+                use_cache=use_cache,
+                cache_key=cache_key,
             )
 
             # Parse extracted keywords
-            keywords_text = self._parse_response(response, "extract_keywords")
             if not keywords_text:
                 self.logger.warning("❌ Failed to extract keywords from article.")
                 return []
@@ -235,22 +337,28 @@ class AIService:
             self.logger.error(f"❌ Error extracting keywords: {e}")
             return []
 
-    def _find_preferences_with_similar_embeddings(self, current_preferences: PreferencesWithEmbeddings, article_embedding: List[float]) -> Dict:
-        similar_preferences = {}
+    def _find_preferences_with_similar_embeddings(self, current_preferences: PreferenceMatrix, article_embedding: List[float]) -> Dict:
+        # Only consider reasonably similar preferences
+        return {
+            keyword: {
+                "similarity": similarity,
+                "current_score": current_preferences.get_score(keyword)
+            }
+            for keyword, similarity in current_preferences.search_threshold(article_embedding, 0.3)
+        }
 
-        for keyword, data in current_preferences.items():
-            if isinstance(data, dict) and "embedding" in data:
-                # Calculate similarity between article and this preference
-                similarity = self.cosine_similarity(article_embedding, data["embedding"])
-                if similarity > 0.3:  # Only consider reasonably similar preferences
-                    similar_preferences[keyword] = {
-                        "similarity": similarity,
-                        "current_score": data["score"]
-                    }
+    def _fill_missing_embeddings(self, preferences: PreferenceMatrix) -> None:
+        """Embed legacy preferences that were stored without an embedding"""
+        missing = [keyword for keyword in preferences.keywords if not preferences.has_embedding(keyword)]
+        if not missing:
+            return
 
-        return similar_preferences
+        for keyword, embedding in zip(missing, self.get_embeddings(missing)):
+            if embedding is not None:
+                preferences.set_embedding(keyword, embedding)
+                self.logger.debug(f"  Generated missing embedding for preference '{keyword}'")
 
-    def _update_preferences_based_on_embeddings_and_keywords(self, current_preferences: PreferencesWithEmbeddings, similar_preferences: Dict, extracted_keywords: List[str], rating: int) -> PreferencesWithEmbeddings:
+    def _update_preferences_based_on_embeddings_and_keywords(self, current_preferences: PreferenceMatrix, similar_preferences: Dict, extracted_keywords: List[str], rating: int) -> PreferenceMatrix:
         updated_prefs = current_preferences.copy()
         updated_preference_keys = set()
 
@@ -262,25 +370,29 @@ class AIService:
             # Adjust score based on rating and similarity strength
             if rating == 3:
                 boost = 1 if similarity > 0.7 else 0.5
-                updated_prefs[keyword]["score"] = min(5, current_score + boost)
+                updated_prefs.set_score(keyword, min(5, current_score + boost))
             elif rating == 1:
                 reduction = 1 if similarity > 0.7 else 0.5
-                updated_prefs[keyword]["score"] = max(1, current_score - reduction)
+                updated_prefs.set_score(keyword, max(1, current_score - reduction))
             # rating == 2: no change (neutral)
 
             updated_preference_keys.add(keyword)
             self.logger.debug(f"  Updated similar preference '{keyword}' (article similarity: {similarity:.3f})")
 
         # Step 2: Process each extracted keyword
+        new_keywords = list(dict.fromkeys(keyword for keyword in extracted_keywords if keyword not in updated_prefs))
+        new_keyword_embeddings = dict(zip(new_keywords, self.get_embeddings(new_keywords)))
+
         for keyword in extracted_keywords:
             if keyword not in updated_prefs:
                 # NEW KEYWORD: Add with initial score
+                keyword_embedding = new_keyword_embeddings.get(keyword)
+                if keyword_embedding is None:
+                    self.logger.warning(f"⚠️  Skipping new preference '{keyword}' without embedding")
+                    continue
+
                 base_score = self._get_initial_score_for_rating(rating)
-                keyword_embedding = self.get_embedding(keyword)
-                updated_prefs[keyword] = {
-                    "score": base_score,
-                    "embedding": keyword_embedding
-                }
+                updated_prefs.add(keyword, base_score, keyword_embedding)
                 self.logger.debug(f"  Added new preference '{keyword}' with score {base_score}")
             else:
                 # EXISTING KEYWORD: Handle if not already updated
@@ -303,7 +415,7 @@ class AIService:
         else:  # rating == 2
             return 0  # Neutral score (no preference)
 
-    def _handle_existing_keyword_update(self, updated_prefs: PreferencesWithEmbeddings, current_prefs: PreferencesWithEmbeddings, updated_preference_keys: set, keyword: str, rating: int) -> None:
+    def _handle_existing_keyword_update(self, updated_prefs: PreferenceMatrix, current_prefs: PreferenceMatrix, updated_preference_keys: set, keyword: str, rating: int) -> None:
         # Check for semantic similarity first
         keyword_updated = self._update_similar_preferences_via_keyword(
             updated_prefs, current_prefs, updated_preference_keys, keyword, rating
@@ -313,73 +425,33 @@ class AIService:
         if not keyword_updated:
             self._update_keyword_score(updated_prefs, keyword, rating)
 
-    def _update_similar_preferences_via_keyword(self, updated_prefs: PreferencesWithEmbeddings, current_prefs: PreferencesWithEmbeddings, updated_preference_keys: set, keyword: str, rating: int) -> bool:
-        if not isinstance(current_prefs[keyword], dict) or "embedding" not in current_prefs[keyword]:
+    def _update_similar_preferences_via_keyword(self, updated_prefs: PreferenceMatrix, current_prefs: PreferenceMatrix, updated_preference_keys: set, keyword: str, rating: int) -> bool:
+        if keyword not in current_prefs or not current_prefs.has_embedding(keyword):
             return False
 
-        keyword_embedding = self.get_embedding(keyword)
-
-        for existing_keyword, data in current_prefs.items():
-            if existing_keyword == keyword or existing_keyword in updated_preference_keys:
-                continue  # Skip self or already updated
-
-            if isinstance(data, dict) and "embedding" in data:
-                keyword_similarity = self.cosine_similarity(keyword_embedding, data["embedding"])
-
-                if keyword_similarity > 0.7:  # High similarity threshold
-                    current_score = data["score"]
-                    new_score = self._calculate_new_score(current_score, rating, keyword_similarity)
-
-                    updated_prefs[existing_keyword]["score"] = new_score
-                    updated_preference_keys.add(existing_keyword)
-
-                    self.logger.debug(f"  Updated similar preference '{existing_keyword}' via keyword '{keyword}' (similarity: {keyword_similarity:.3f})")
-                    return True
-
-        return False
-
-    def cosine_similarity(self, vector_a: List[float], vector_b: List[float]) -> float:
-        try:
-            # Convert to numpy arrays
-            a = np.array(vector_a)
-            b = np.array(vector_b)
-
-            # Cosine similarity formula: dot product / (magnitude_a * magnitude_b)
-            dot_product = np.dot(a, b)
-            magnitude_a = np.linalg.norm(a)
-            magnitude_b = np.linalg.norm(b)
-
-            # Avoid division by zero
-            if magnitude_a == 0 or magnitude_b == 0:
-                return 0.0
-
-            similarity = dot_product / (magnitude_a * magnitude_b)
+        # Most similar preference above the high similarity threshold, skipping self or already updated
+        matches = [
+            (existing_keyword, similarity)
+            for existing_keyword, similarity in current_prefs.search_threshold(current_prefs.get_embedding(keyword), 0.7)
+            if existing_keyword != keyword and existing_keyword not in updated_preference_keys
+        ]
+        if not matches:
+            return False
 
-            # Ensure result is between -1 and 1
-            return max(-1.0, min(1.0, similarity))
+        existing_keyword, keyword_similarity = matches[0]
+        new_score = self._calculate_new_score(current_prefs.get_score(existing_keyword), rating, keyword_similarity)
 
-        except Exception as e:
-            self.logger.error(f"❌  Error calculating cosine similarity: {e}. Returning 0.0.")
-            return 0.0
+        updated_prefs.set_score(existing_keyword, new_score)
+        updated_preference_keys.add(existing_keyword)
 
-    def _update_keyword_score(self, updated_prefs: PreferencesWithEmbeddings, keyword: str, rating: int) -> None:
-        if isinstance(updated_prefs[keyword], dict) and "score" in updated_prefs[keyword]:
-            current_score = updated_prefs[keyword]["score"]
-        else:
-            current_score = updated_prefs[keyword]
+        self.logger.debug(f"  Updated similar preference '{existing_keyword}' via keyword '{keyword}' (similarity: {keyword_similarity:.3f})")
+        return True
 
+    def _update_keyword_score(self, updated_prefs: PreferenceMatrix, keyword: str, rating: int) -> None:
+        current_score = updated_prefs.get_score(keyword)
         new_score = self._calculate_new_score(current_score, rating, 1.0)  # Exact match = 1.0 similarity
 
-        # Ensure the preference has embedding data
-        if isinstance(updated_prefs[keyword], dict) and "embedding" in updated_prefs[keyword]:
-            updated_prefs[keyword]["score"] = new_score
-        else:
-            # Generate embedding for existing keyword that doesn't have one
-            keyword_embedding = self.get_embedding(keyword)
-            updated_prefs[keyword] = {
-                "score": new_score,
-                "embedding": keyword_embedding
-            }
+        updated_prefs.set_score(keyword, new_score)
 
         self.logger.debug(f"  Updated exact match preference '{keyword}' from {current_score} to {new_score}")
 
@@ -394,9 +466,79 @@ class AIService:
             return current_score  # no change
 
     def get_embedding(self, text: str) -> List[float]:
+        embedding = self.get_embeddings([text])[0]
+        if embedding is None:
+            self.logger.error("❌  Returning zero vector for failed embedding.")
+            return [0.0] * EMBEDDING_DIMENSIONS
+
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed many texts, serving repeats from the embedding cache.
+
+        Cache misses are sent as chunked multi-input requests. Returns one entry per
+        input text, in order. Entries are None for inputs that could not be embedded
+        (empty text, or failed even when retried alone).
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+
+        keys = [EmbeddingCache.make_key(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, text) for text in texts]
+        cached = self.embedding_cache.get_many(key for key, text in zip(keys, texts) if text and text.strip())
+
+        missing: List[int] = []
+        for i, text in enumerate(texts):
+            if keys[i] in cached:
+                embeddings[i] = cached[keys[i]]
+            elif text and text.strip():
+                missing.append(i)
+
+        # Embed each distinct missing text once
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        fetched = dict(zip(missing_texts, self._fetch_embeddings(missing_texts)))
+        for i in missing:
+            embeddings[i] = fetched[texts[i]]
+
+        self.embedding_cache.put_many(
+            (EmbeddingCache.make_key(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, text), embedding)
+            for text, embedding in fetched.items() if embedding is not None
+        )
+
+        failed = sum(1 for embedding in embeddings if embedding is None)
+        if failed:
+            self.logger.warning(f"⚠️  Failed to embed {failed}/{len(texts)} texts")
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"  Embedding cache: {len(texts) - len(missing)} cached, {len(missing_texts)} fetched ({self.embedding_cache.stats()})")
+        return embeddings
+
+    def _fetch_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            indices = list(range(start, min(start + EMBEDDING_BATCH_SIZE, len(texts))))
+
+            try:
+                response = self.client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=[texts[i] for i in indices],
+                    encoding_format="float"
+                )
+
+                for item in response.data:
+                    embeddings[indices[item.index]] = item.embedding
+
+            except Exception as e:
+                # One bad input fails the whole request, so retry this chunk item by item
+                self.logger.warning(f"⚠️  Batch embedding failed ({e}), retrying {len(indices)} inputs individually")
+                for i in indices:
+                    embeddings[i] = self._create_embedding(texts[i])
+
+        return embeddings
+
+    def _create_embedding(self, text: str) -> Optional[List[float]]:
         try:
             response = self.client.embeddings.create(
-                model="text-embedding-3-small",
+                model=EMBEDDING_MODEL,
                 input=text,
                 encoding_format="float"
             )
@@ -404,8 +546,8 @@ class AIService:
             return response.data[0].embedding
 
         except Exception as e:
-            self.logger.error(f"❌  Error getting embedding: {e}. Returning zero vector.")
-            return [0.0] * 1536
+            self.logger.error(f"❌  Error getting embedding: {e}")
+            return None
 
     def _parse_response(self, response: Any, function_name: str = "unknown") -> str:
         try:
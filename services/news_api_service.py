@@ -1,45 +1,184 @@
+import os
+import math
 import requests
 import datetime
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from config import Config
 from logger import get_logger
-from typing import List, Dict
+from caches import ResponseCache
+from http_session import get_session, RateLimiter
+from preference_matrix import PreferenceMatrix
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+NEWS_API_PAGE_SIZE = 100  # The most NewsAPI returns per page
+
+Page = Tuple[List[Dict], int]  # Articles and the query's total result count
+PageCallback = Callable[[str, int, int, str], None]  # Query, page number, article count, and where the page came from
 
 
 class NewsApiService:
     def __init__(self, config: Config):
         self.config = config
         self.logger = get_logger()
+        self.rate_limiter = RateLimiter(config.news_requests_per_second, burst=config.news_max_workers)
+
+        # Pages are fresh for `news_cache_ttl`, then served stale for up to `news_cache_stale` while refreshed in the background
+        self.cache = ResponseCache(
+            os.path.join(config.data_dir, "newsapi.sqlite3"),
+            config.news_cache_max_entries,
+            config.news_cache_ttl + config.news_cache_stale,
+            name="NewsAPI"
+        )
+        self._revalidator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="newsapi-revalidate")
+        self._revalidating: Set[str] = set()
+        self._revalidating_lock = threading.Lock()
+
+    def close(self) -> None:
+        self._revalidator.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
+
+    def queries_for(self, preferences: Optional[PreferenceMatrix] = None) -> List[str]:
+        """The configured queries, plus the top-scored preference keywords if preferences are given"""
+        queries = [query.strip() for query in self.config.news_queries.split(",") if query.strip()]
+
+        if preferences is not None and self.config.news_preference_queries > 0:
+            liked = sorted(
+                (keyword for keyword in preferences.keywords if preferences.get_score(keyword) > 0),
+                key=lambda keyword: -preferences.get_score(keyword)
+            )
+            # Quoted, so multi-word keywords are searched as phrases
+            queries += [f'"{keyword}"' if " " in keyword else keyword for keyword in liked[:self.config.news_preference_queries]]
 
-    def fetch_top_news_articles(self, days_back: int = 1) -> List[Dict]:
+        return list(dict.fromkeys(queries))
+
+    def iter_articles(self, queries: Sequence[str], days_back: int = 1, max_pages: Optional[int] = None, refresh: bool = False,
+                      on_page: Optional[PageCallback] = None) -> Iterator[Dict]:
+        """Fetch every query's pages concurrently, yielding articles as pages arrive.
+
+        Page 1 of every query is requested up front; further pages, up to `max_pages`
+        per query, once page 1 says how many results there are. Requests are spread
+        out by the rate limiter, and articles already yielded (by URL) are skipped.
+        Pages come from the response cache when possible, unless `refresh` is set.
+        `on_page` is told about every page as it arrives, before its articles are yielded.
+        """
         today = datetime.date.today()
         from_date = today - datetime.timedelta(days=days_back)
+        max_pages = max_pages or self.config.news_max_pages
+
+        seen_urls: Set[str] = set()
+        sources: Counter = Counter()
+        executor = ThreadPoolExecutor(max_workers=self.config.news_max_workers, thread_name_prefix="newsapi")
+        pending: Dict[Future, Tuple[str, int]] = {
+            executor.submit(self._fetch_page, query, from_date, today, 1, refresh): (query, 1) for query in queries
+        }
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query, page = pending.pop(future)
+                    (articles, total_results), source = future.result()
+                    sources[source] += 1
+                    if on_page is not None:
+                        on_page(query, page, len(articles), source)
+
+                    if page == 1:
+                        pages = min(max_pages, math.ceil(total_results / NEWS_API_PAGE_SIZE))
+                        for next_page in range(2, pages + 1):
+                            pending[executor.submit(self._fetch_page, query, from_date, today, next_page, refresh)] = (query, next_page)
 
-        url = "https://newsapi.org/v2/everything"
+                    for article in articles:
+                        url = article.get("url")
+                        if url and url not in seen_urls:
+                            seen_urls.add(url)
+                            yield article
+        finally:
+            # The consumer may stop early; don't wait for pages nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.logger.info(f"📦  NewsAPI pages: {', '.join(f'{count} {source}' for source, count in sources.items()) or 'none'}")
+
+    def _fetch_page(self, query: str, from_date: datetime.date, to_date: datetime.date, page: int, refresh: bool = False) -> Tuple[Page, str]:
+        """One page of results, and where it came from: cached, stale, fetched or failed"""
+        key = ResponseCache.make_key(NEWS_API_URL, query, from_date, to_date, page, NEWS_API_PAGE_SIZE)
+
+        cached = None if refresh else self.cache.get(key)
+        if cached is not None:
+            articles, total_results = cached.value
+            if cached.age < self.config.news_cache_ttl:
+                return (articles, total_results), "cached"
+
+            # Serve the stale page right away, and refresh it for next time
+            self._revalidate(key, query, from_date, to_date, page)
+            return (articles, total_results), "stale"
+
+        fetched = self._request_page(query, from_date, to_date, page)
+        if fetched is None:
+            return ([], 0), "failed"
+
+        self.cache.put(key, fetched)
+        return fetched, "fetched"
+
+    def _revalidate(self, key: str, query: str, from_date: datetime.date, to_date: datetime.date, page: int) -> None:
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def refresh() -> None:
+            try:
+                fetched = self._request_page(query, from_date, to_date, page)
+                if fetched is not None:
+                    self.cache.put(key, fetched)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        try:
+            self._revalidator.submit(refresh)
+        except RuntimeError:
+            # Shutting down
+            with self._revalidating_lock:
+                self._revalidating.discard(key)
+
+    def _request_page(self, query: str, from_date: datetime.date, to_date: datetime.date, page: int) -> Optional[Page]:
+        """One page from NewsAPI, or None on failure"""
         params = {
-            "q": "world",
+            "q": query,
             "from": from_date,
-            "to": today,
+            "to": to_date,
             "language": "en",
-            "sortBy": "popularity"
+            "sortBy": "popularity",
+            "pageSize": NEWS_API_PAGE_SIZE,
+            "page": page,
         }
 
         try:
-            response = requests.get(
-                url,
+            self.rate_limiter.acquire()
+            response = get_session().get(
+                NEWS_API_URL,
                 params=params,
                 headers={"Authorization": self.config.news_api_key},
                 timeout=30
             )
-            response.raise_for_status()
 
-            articles = response.json().get("articles", [])
-            self.logger.info(f"📰  Found {len(articles)} articles from {from_date} to {today}")
+            # Plans that cap the number of results reject pages past the cap
+            if response.status_code in (400, 426) and response.json().get("code") == "maximumResultsReached":
+                self.logger.info(f"📰  No more pages for '{query}' past page {page - 1} (plan result limit)")
+                return [], 0
+
+            response.raise_for_status()
+            data = response.json()
 
-            return articles if articles else []
+            articles = data.get("articles") or []
+            self.logger.info(f"📰  Found {len(articles)} articles for '{query}' (page {page}) from {from_date} to {to_date}")
+            return articles, data.get("totalResults", 0)
 
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"❌  Failed to fetch news: {e}")
-            return []
+            self.logger.error(f"❌  Failed to fetch news for '{query}' (page {page}): {e}")
+            return None
         except Exception as e:
-            self.logger.error(f"❌  Unexpected error fetching news: {e}")
-            return []
+            self.logger.error(f"❌  Unexpected error fetching news for '{query}' (page {page}): {e}")
+            return None
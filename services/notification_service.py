@@ -1,25 +1,31 @@
 from email.message import EmailMessage
 import smtplib
 import textwrap
-import requests
 from logger import get_logger
+from http_session import get_session
 from typing import Dict, Optional
 from config import Config
 from utils import render_template
+from image_mirror import ImageMirror
+
+EMAIL_IMAGE_SIZES = "(max-width: 600px) 100vw, 600px"
 
 
 class NotificationService:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, image_mirror: Optional[ImageMirror] = None):
         self.config = config
         self.logger = get_logger()
+        self.image_mirror = image_mirror or ImageMirror(config)
 
 
-    def notify(self, article: Dict, summary: str, subject: str, image_url: Optional[str] = None, article_id: Optional[str] = None) -> None:
+    def send_email(self, article: Dict, summary: str, subject: str, image_url: Optional[str] = None, article_id: Optional[str] = None) -> None:
         if self.config.email_enabled:
             body = self._create_email_body(article, summary)
             body_html = render_template('email.html',
+                autoescape=True,
                 title=article['title'],
-                image_html=f'<img src="{image_url}" alt="Article image" class="image">' if image_url else '',
+                # Many mail clients can't show WebP, so emails only get the JPEG variants
+                image_html=self.image_mirror.image_html(image_url, EMAIL_IMAGE_SIZES, webp=False),
                 summary=summary,
                 original_url=article['url'],
                 article_url=f"{self.config.domain}/article/{article_id}" if article_id else '#'
@@ -30,6 +36,7 @@ class NotificationService:
         else:
             self.logger.debug("📧   Email sending disabled - skipping email")
 
+    def send_push(self, article: Dict, article_id: Optional[str] = None) -> None:
         self._send_push_notification(article['title'], article_id)
 
     def _create_email_body(self, article: Dict, summary: str) -> str:
@@ -72,7 +79,7 @@ class NotificationService:
                 "Content-Type": "text/plain; charset=utf-8"
             }
 
-            response = requests.post(
+            response = get_session().post(
                 f"https://ntfy.sh/{ntfy_topic}",
                 data=article_title.encode('utf-8'),
                 headers=headers,
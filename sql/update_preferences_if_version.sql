@@ -0,0 +1,30 @@
+-- Compare-and-swap write for PreferencesStore.update_if_version.
+--
+-- Checks that the latest stored version is still `expected_version` (0 for an empty
+-- table), flips is_latest and inserts the new version in one transaction.
+-- Returns the new version, or NULL if another writer got there first.
+create or replace function update_preferences_if_version(expected_version integer, new_preferences jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    latest_version integer;
+begin
+    -- Lock the latest row so concurrent writers queue up behind each other here
+    select version into latest_version from preferences where is_latest for update;
+
+    if coalesce(latest_version, 0) <> expected_version then
+        return null;
+    end if;
+
+    update preferences set is_latest = false where is_latest;
+    insert into preferences (preferences, version, is_latest)
+    values (new_preferences, expected_version + 1, true);
+
+    return expected_version + 1;
+exception
+    -- Two writers racing on an empty table both pass the check; the unique version loses one
+    when unique_violation then
+        return null;
+end;
+$$;
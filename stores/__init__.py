@@ -1,4 +1,5 @@
 from .preferences_store import PreferencesStore
 from .articles_store import ArticlesStore
+from .preferences_backends import SupabasePreferencesBackend, InMemoryPreferencesBackend
 
-__all__ = ["PreferencesStore", "ArticlesStore"]
+__all__ = ["PreferencesStore", "ArticlesStore", "SupabasePreferencesBackend", "InMemoryPreferencesBackend"]
@@ -3,32 +3,29 @@ import datetime
 from logger import get_logger
 from supabase import create_client, Client
 from config import Config
-from typing import Optional, Any, Dict
+from caches import SeenUrlIndex
+from typing import Optional, Dict, List
 from _types import ExtractedArticleData
 
 ARTICLE_RETENTION_DAYS = 30
+STORED_URLS_PAGE_SIZE = 1000  # PostgREST's default row limit
 
-class ArticlesStore:
-    _instance = None
-    _initialized = False
-
-    def __new__(cls, *args: Any, **kwargs: Any) -> 'ArticlesStore':
-        if cls._instance is None:
-            cls._instance = super(ArticlesStore, cls).__new__(cls)
-        return cls._instance
+# Columns needed to render the article page
+ARTICLE_PAGE_COLUMNS = 'title, summary, content, url, image_url, created_at, expires_at'
 
-    def __init__(self, config: Config):
-        if not self._initialized:
-            self.config = config
-            self.logger = get_logger()
+class ArticlesStore:
+    def __init__(self, config: Config, supabase: Optional[Client] = None, seen_urls: Optional[SeenUrlIndex] = None):
+        self.config = config
+        self.logger = get_logger()
+        self.seen_urls = seen_urls
 
-            self.supabase: Client = create_client(
-                config.supabase_url,
-                config.supabase_key
-            )
+        # Share the container's client when given one, otherwise connect on our own
+        self.supabase: Client = supabase or create_client(
+            config.supabase_url,
+            config.supabase_key
+        )
 
-            ArticlesStore._initialized = True
-            self.logger.info("✅  ArticlesStore initialized")
+        self.logger.info("✅  ArticlesStore initialized")
 
     def store_article(self, article_data: ExtractedArticleData, summary: str, image_url: Optional[str] = None) -> str:
         article_id = str(uuid.uuid4())
@@ -45,6 +42,9 @@ class ArticlesStore:
                 'expires_at': (datetime.datetime.now() + datetime.timedelta(days=ARTICLE_RETENTION_DAYS)).isoformat()
             }).execute()
 
+            if self.seen_urls is not None:
+                self.seen_urls.add(article_data['url'])
+
             self.logger.info(f"📄  Stored article with ID: {article_id}")
             return article_id
 
@@ -52,9 +52,19 @@ class ArticlesStore:
             self.logger.error(f"❌  Failed to store article in Supabase: {e}")
             return ""
 
-    def get_article(self, article_id: str) -> Optional[Dict]:
+    def update_image_url(self, article_id: str, image_url: str) -> bool:
+        """Fill in the image of an article that was stored before its image was ready"""
+        try:
+            self.supabase.table('articles').update({'image_url': image_url}).eq('id', article_id).execute()
+            return True
+
+        except Exception as e:
+            self.logger.error(f"❌  Failed to update image of article {article_id} in Supabase: {e}")
+            return False
+
+    def get_article(self, article_id: str, columns: str = '*') -> Optional[Dict]:
         try:
-            response = self.supabase.table('articles').select('*').eq('id', article_id).execute()
+            response = self.supabase.table('articles').select(columns).eq('id', article_id).execute()
 
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -66,6 +76,24 @@ class ArticlesStore:
             self.logger.error(f"❌  Failed to get article from Supabase: {e}")
             return None
 
+    def get_stored_urls(self) -> List[str]:
+        """Every stored article's URL, in as few queries as the row limit allows"""
+        urls: List[str] = []
+        offset = 0
+        try:
+            while True:
+                response = self.supabase.table('articles').select('url').range(offset, offset + STORED_URLS_PAGE_SIZE - 1).execute()
+                rows = response.data or []
+                # Page by rows read, not URLs kept, so rows without a URL don't shift the next page
+                offset += len(rows)
+                urls.extend(row['url'] for row in rows if row.get('url'))
+                if len(rows) < STORED_URLS_PAGE_SIZE:
+                    return urls
+
+        except Exception as e:
+            self.logger.error(f"❌  Failed to get stored article URLs from Supabase: {e}")
+            return urls
+
     def cleanup_old_articles(self) -> None:
         try:
             cutoff_time = datetime.datetime.now().isoformat()
@@ -0,0 +1,58 @@
+import copy
+import threading
+from supabase import Client
+from typing import Any, Dict, List, Optional, Union
+
+
+class SupabasePreferencesBackend:
+    """Row access for PreferencesStore on the Supabase `preferences` table"""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    def fetch_versions(self, upper: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` rows (version, preferences) at or below `upper`, newest first"""
+        query = self.supabase.table('preferences').select('version, preferences').order('version', desc=True).limit(limit)
+        if upper is not None:
+            query = query.lte('version', upper)
+        return query.execute().data or []
+
+    def insert_if_version(self, expected_version: int, preferences: Dict[str, Any]) -> Optional[int]:
+        """Insert the next version if the latest is still `expected_version`, in one round trip.
+
+        Backed by the update_preferences_if_version database function (see sql/).
+        Returns the new version, or None on a version conflict.
+        """
+        response = self.supabase.rpc('update_preferences_if_version', {
+            'expected_version': expected_version,
+            'new_preferences': preferences
+        }).execute()
+        return response.data
+
+
+class InMemoryPreferencesBackend:
+    """Local stand-in for the Supabase backend, for tests and offline runs"""
+
+    def __init__(self) -> None:
+        self.rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def fetch_versions(self, upper: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [row for row in self.rows if upper is None or row['version'] <= upper]
+            rows.sort(key=lambda row: row['version'], reverse=True)
+            return copy.deepcopy([{'version': row['version'], 'preferences': row['preferences']} for row in rows[:limit]])
+
+    def insert_if_version(self, expected_version: int, preferences: Dict[str, Any]) -> Optional[int]:
+        with self._lock:
+            latest_version = max((row['version'] for row in self.rows), default=0)
+            if latest_version != expected_version:
+                return None
+
+            for row in self.rows:
+                row['is_latest'] = False
+            self.rows.append({'version': expected_version + 1, 'preferences': copy.deepcopy(preferences), 'is_latest': True})
+            return expected_version + 1
+
+
+PreferencesBackend = Union[SupabasePreferencesBackend, InMemoryPreferencesBackend]
@@ -3,88 +3,160 @@ from logger import get_logger
 from supabase import create_client, Client
 import json
 from _types import PreferencesWithEmbeddings
-from typing import Dict, Any
+from preference_matrix import PreferenceMatrix
+from .preferences_backends import PreferencesBackend, SupabasePreferencesBackend
+from embedding_codec import encode_preferences, decode_preferences, encode_preferences_delta, apply_preferences_delta, is_preferences_delta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 
-class PreferencesStore:
-    _instance = None
-    _initialized = False
+class PreferencesVersion(NamedTuple):
+    version: int
+    preferences: PreferenceMatrix
+    snapshot_version: int  # The full snapshot this version is reconstructed from
+
 
-    def __new__(cls, *args: Any, **kwargs: Any) -> 'PreferencesStore':
-        if cls._instance is None:
-            cls._instance = super(PreferencesStore, cls).__new__(cls)
-        return cls._instance
+class PreferencesStore:
+    def __init__(self, config: Config, supabase: Optional[Client] = None, backend: Optional[PreferencesBackend] = None):
+        self.config = config
+        self.logger = get_logger()
 
-    def __init__(self, config: Config):
-        if not self._initialized:
-            self.config = config
-            self.logger = get_logger()
+        # Share the container's client when given one, otherwise connect on our own
+        self.backend: PreferencesBackend = backend or SupabasePreferencesBackend(supabase or create_client(
+            config.supabase_url,
+            config.supabase_key
+        ))
 
-            self.supabase: Client = create_client(
-                config.supabase_url,
-                config.supabase_key
-            )
+        # Versions are stored as deltas, with a full snapshot every `snapshot_interval` versions
+        self.snapshot_interval = max(1, config.preferences_snapshot_interval)
+        self._latest: Optional[PreferencesVersion] = None
 
-            PreferencesStore._initialized = True
-            self.logger.info("✅  PreferencesStore initialized")
+        self.logger.info("✅  PreferencesStore initialized")
 
-    def get_preferences_with_embeddings(self) -> PreferencesWithEmbeddings:
+    def get_preferences_with_embeddings(self) -> PreferenceMatrix:
         try:
-            response = self.supabase.table('preferences').select('preferences').eq('is_latest', True).execute()
-
-            if response.data and len(response.data) > 0:
-                preferences = response.data[0]['preferences']
+            latest = self._load_version()
 
-                return preferences
+            if latest:
+                self._latest = latest
+                return latest.preferences.copy()
             else:
                 self.logger.warning("🤷  No preferences found in Supabase. Using default.")
-                return self._parse_config_default()
+                return PreferenceMatrix.from_dict(self._parse_config_default())
 
         except Exception as e:
             self.logger.error(f"❌  Failed to get preferences with embeddings from Supabase: {e}. Using default.")
-            return self._parse_config_default()
+            return PreferenceMatrix.from_dict(self._parse_config_default())
+
+    def get_preferences_with_version(self) -> Tuple[int, PreferenceMatrix]:
+        """Latest preferences and their version (0 when nothing is stored yet, with the defaults).
+
+        Unlike get_preferences_with_embeddings, storage errors are raised rather than
+        papered over with defaults, since the version is meant for update_if_version.
+        """
+        latest = self._load_version()
+        if not latest:
+            return 0, PreferenceMatrix.from_dict(self._parse_config_default())
+
+        self._latest = latest
+        return latest.version, latest.preferences.copy()
+
+    def get_preferences_version(self, version: int) -> Optional[PreferenceMatrix]:
+        """Reconstruct any stored version, e.g. for auditing how preferences evolved"""
+        loaded = self._load_version(version)
+        if not loaded or loaded.version != version:
+            self.logger.warning(f"🤷  Preferences version {version} not found")
+            return None
+
+        return loaded.preferences
+
+    def _load_version(self, version: Optional[int] = None) -> Optional[PreferencesVersion]:
+        """Load a version (latest if None) by applying deltas to the nearest snapshot at or below it"""
+        rows: List[Dict[str, Any]] = []  # Newest first, ending with the snapshot
+        upper = version
+
+        # Snapshots are written every `snapshot_interval` versions, so one page normally reaches one
+        while not rows or is_preferences_delta(rows[-1]['preferences']):
+            page = self.backend.fetch_versions(upper, self.snapshot_interval)
+
+            for row in page:
+                rows.append(row)
+                if not is_preferences_delta(row['preferences']):
+                    break
+
+            if not page:
+                if rows:
+                    raise ValueError(f"No preferences snapshot found below version {rows[-1]['version']}")
+                return None
+            upper = page[-1]['version'] - 1
+
+        snapshot = rows[-1]
+        preferences = decode_preferences(snapshot['preferences'])
+        previous_version = snapshot['version']
+
+        for row in reversed(rows[:-1]):
+            delta = row['preferences']
+            if delta['base_version'] != previous_version:
+                raise ValueError(f"Preferences version {row['version']} is based on {delta['base_version']}, expected {previous_version}")
+            preferences = apply_preferences_delta(preferences, delta)
+            previous_version = row['version']
+
+        self.logger.debug(f"  Loaded preferences version {rows[0]['version']} from snapshot {snapshot['version']} + {len(rows) - 1} deltas")
+        return PreferencesVersion(rows[0]['version'], preferences, snapshot['version'])
+
+    def _encode_version(self, preferences: PreferenceMatrix, base: Optional[PreferencesVersion], version: int, snapshot: bool = False) -> Tuple[Dict[str, Any], int]:
+        """Encode a new version as a delta against `base`, or as a full snapshot every `snapshot_interval` versions.
+
+        Returns the payload and the snapshot version the new version is reconstructed from.
+        """
+        dtype = self.config.preferences_embedding_dtype
+        if snapshot or base is None or version - base.snapshot_version >= self.snapshot_interval:
+            return encode_preferences(preferences, dtype), version
+
+        return encode_preferences_delta(base.preferences, preferences, base.version, dtype), base.snapshot_version
+
+    def update_if_version(self, expected_version: int, new_preferences: Union[PreferenceMatrix, PreferencesWithEmbeddings], snapshot: bool = False) -> bool:
+        """Atomically store `new_preferences` as the next version, if the latest is still `expected_version`.
+
+        The check, the is_latest flip and the insert happen in a single round trip.
+        Returns False on a version conflict, so the caller can reload and retry.
+        Pass snapshot=True to store a full snapshot even if a delta is due, e.g.
+        after a compaction that rewrote most rows.
+        """
+        preferences = PreferenceMatrix.ensure(new_preferences).copy()
+
+        base: Optional[PreferencesVersion] = None
+        if expected_version > 0:
+            # The delta is computed against the expected version, reusing the one we last read or wrote
+            base = self._latest if self._latest and self._latest.version == expected_version else self._load_version(expected_version)
+            if not base or base.version != expected_version:
+                self.logger.warning(f"⚠️  Preferences version {expected_version} not found, cannot update")
+                return False
+
+        new_version = expected_version + 1
+        encoded_preferences, snapshot_version = self._encode_version(preferences, base, new_version, snapshot)
+
+        if self.backend.insert_if_version(expected_version, encoded_preferences) is None:
+            self.logger.warning(f"⚠️  Preferences version conflict: version {expected_version} is no longer the latest")
+            return False
+
+        self._latest = PreferencesVersion(new_version, preferences, snapshot_version)
+        kind = "snapshot" if snapshot_version == new_version else "delta"
+        self.logger.info(f"📝 Saved {len(preferences)} preferences with embeddings to database (version {new_version}, {kind})")
+        return True
 
-    def update_preferences_with_embeddings(self, new_preferences: PreferencesWithEmbeddings) -> bool:
-        """Update preferences that already include embeddings"""
+    def update_preferences_with_embeddings(self, new_preferences: Union[PreferenceMatrix, PreferencesWithEmbeddings, str]) -> bool:
+        """Store preferences as the next version, whatever the latest version is (last writer wins)"""
         try:
-            # Handle both dict and string inputs
+            # Handle matrix, dict and string inputs
             if isinstance(new_preferences, str):
-                preferences_dict = json.loads(new_preferences)
-            else:
-                preferences_dict = new_preferences
+                new_preferences = json.loads(new_preferences)
 
-            # Use a more atomic approach with retry logic for race conditions
             max_retries = 3
             for attempt in range(max_retries):
-                try:
-                    # Get current version in the same operation we'll use for updating
-                    response = self.supabase.table('preferences').select('version').order('version', desc=True).limit(1).execute()
-                    current_version = 1
-                    if response.data and len(response.data) > 0:
-                        current_version = response.data[0]['version'] + 1
-
-                    # First, set all existing preferences to not latest
-                    self.supabase.table('preferences').update({'is_latest': False}).eq('is_latest', True).execute()
-
-                    # Then insert the new preferences with the incremented version
-                    # If another process inserted the same version, this will fail due to unique constraint
-                    self.supabase.table('preferences').insert({
-                        'preferences': preferences_dict,
-                        'version': current_version,
-                        'is_latest': True
-                    }).execute()
-
-                    self.logger.info(f"📝 Saved {len(preferences_dict)} preferences with embeddings to database (version {current_version})")
+                latest = self._load_version()
+                if self.update_if_version(latest.version if latest else 0, new_preferences):
                     return True
-
-                except Exception as insert_error:
-                    if "duplicate" in str(insert_error).lower() or "unique" in str(insert_error).lower():
-                        self.logger.warning(f"Version conflict detected, retrying... (attempt {attempt + 1}/{max_retries})")
-                        if attempt < max_retries - 1:
-                            import time
-                            time.sleep(0.1)  # Brief delay before retry
-                            continue
-                    raise insert_error
+                self.logger.warning(f"Version conflict detected, retrying... (attempt {attempt + 1}/{max_retries})")
 
             self.logger.error(f"❌  Failed to save preferences after {max_retries} attempts - version conflicts")
             return False
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the prompt-keyed chat completion cache in AIService
+Runs offline with a stub OpenAI client, no API keys needed
+"""
+
+import types
+import tempfile
+from logger import get_logger
+from config import Config
+from services import AIService
+
+class StubCompletions:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def create(self, **kwargs) -> types.SimpleNamespace:
+        self.calls.append(kwargs)
+        content = "" if "empty" in kwargs["messages"][-1]["content"] else f"reply {len(self.calls)}"
+        if kwargs.get("stream"):
+            return iter([types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=piece))]) for piece in ("reply ", str(len(self.calls)), None)])
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))])
+
+def test_completion_cache() -> None:
+    """Test that identical prompts are answered from the cache and different ones aren't, streamed or not"""
+    logger = get_logger()
+    logger.info("🧪 Testing completion cache...")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        completions = StubCompletions()
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+        ai_service = AIService(Config(data_dir=data_dir), client)
+
+        # Test 1: The same input is only sent once
+        logger.info("📝 Test 1: Cache hits...")
+        summary = ai_service.summarize_article("A long article about rivers.")
+        assert ai_service.summarize_article("A long article about rivers.") == summary
+        assert len(completions.calls) == 1
+
+        # Test 2: A different input, prompt or bypass goes to the API
+        logger.info("🔀 Test 2: Cache misses and bypass...")
+        assert ai_service.summarize_article("Another article.") != summary
+        assert ai_service.generate_subject_line("Rivers", summary) != summary
+        assert ai_service.summarize_article("A long article about rivers.", use_cache=False) != summary
+        assert len(completions.calls) == 4
+
+        # Test 3: Keyword extraction is cached per summary, however the current keywords changed
+        logger.info("🔑 Test 3: Keyword extraction...")
+        keywords = ai_service._extract_relevant_keywords_from_text("Rivers flood.", ["weather"])
+        assert ai_service._extract_relevant_keywords_from_text("Rivers flood.", ["weather", "rivers"]) == keywords
+        ai_service._extract_relevant_keywords_from_text("Lakes freeze.", ["weather", "rivers"])
+        assert len(completions.calls) == 6
+
+        # Test 4: Empty replies aren't cached
+        logger.info("🕳️ Test 4: Empty replies...")
+        assert ai_service.summarize_article("empty") == ""
+        ai_service.summarize_article("empty")
+        assert len(completions.calls) == 8
+
+        # Test 5: Streamed summaries pass each piece on, and are cached like any other
+        logger.info("📡 Test 5: Streaming...")
+        pieces = []
+        assert ai_service.summarize_article("A streamed article.", on_token=pieces.append) == "reply 9"
+        assert pieces == ["reply ", "9"] and completions.calls[-1]["stream"] is True
+        pieces.clear()
+        assert ai_service.summarize_article("A streamed article.", on_token=pieces.append) == "reply 9"
+        assert pieces == ["reply 9"] and len(completions.calls) == 9
+
+        ai_service.completion_cache.close()
+        ai_service.embedding_cache.close()
+
+    logger.info("✅ Completion cache tests completed!")
+
+if __name__ == "__main__":
+    test_completion_cache()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk embedding cache and cached batch embedding in AIService
+Runs offline with a stub OpenAI client, no API keys needed
+"""
+
+import os
+import time
+import types
+import tempfile
+from logger import get_logger
+from config import Config
+from caches import EmbeddingCache
+from services import AIService
+
+class StubEmbeddings:
+    def __init__(self) -> None:
+        self.inputs = []
+
+    def create(self, model: str, input, encoding_format: str) -> types.SimpleNamespace:
+        texts = input if isinstance(input, list) else [input]
+        self.inputs.append(texts)
+        return types.SimpleNamespace(data=[
+            types.SimpleNamespace(index=i, embedding=[float(len(text)), 0.5, -1.0]) for i, text in enumerate(texts)
+        ])
+
+def test_embedding_cache() -> None:
+    """Test persistence across instances, LRU eviction and cache use in get_embeddings"""
+    logger = get_logger()
+    logger.info("🧪 Testing embedding cache...")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "embeddings.sqlite3")
+
+        # Test 1: Embeddings survive closing the cache and are shared with other instances
+        logger.info("💾 Test 1: Persistence...")
+        cache = EmbeddingCache(path, max_entries=10)
+        key = EmbeddingCache.make_key("model", 3, "text")
+        assert key != EmbeddingCache.make_key("model", 4, "text") != EmbeddingCache.make_key("other", 3, "text")
+        cache.put(key, [0.25, -0.5, 1.0])
+        cache.close()
+        reopened = EmbeddingCache(path, max_entries=10)
+        assert reopened.get(key) == [0.25, -0.5, 1.0]
+        assert reopened.get("missing") is None
+        assert reopened.stats() == {"hits": 1, "misses": 1, "entries": 1, "max_entries": 10}
+        reopened.close()
+
+        # Test 2: Past the size cap, the least recently used entries are evicted
+        logger.info("🧹 Test 2: LRU eviction...")
+        cache = EmbeddingCache(os.path.join(data_dir, "small.sqlite3"), max_entries=3)
+        for name in ("a", "b", "c"):
+            cache.put(name, [1.0])
+            time.sleep(0.01)
+        assert cache.get("a") == [1.0]  # Now "b" is the least recently used
+        time.sleep(0.01)
+        cache.put_many([("d", [2.0]), ("e", [3.0])])
+        assert set(cache.get_many(["a", "b", "c", "d", "e"])) == {"a", "d", "e"}
+        assert cache.stats()["entries"] == 3
+        cache.close()
+
+        # Test 3: get_embeddings embeds each distinct text once and serves repeats from the cache
+        logger.info("🔁 Test 3: Deduplication and cache hits...")
+        embeddings = StubEmbeddings()
+        client = types.SimpleNamespace(embeddings=embeddings)
+        ai_service = AIService(Config(data_dir=data_dir), client)
+        result = ai_service.get_embeddings(["rivers", "lakes", "rivers", "", "  "])
+        assert embeddings.inputs == [["rivers", "lakes"]]
+        assert result[0] == result[2] == [6.0, 0.5, -1.0] and result[1] == [5.0, 0.5, -1.0]
+        assert result[3] is None and result[4] is None
+
+        assert ai_service.get_embeddings(["lakes", "rivers"]) == [[5.0, 0.5, -1.0], [6.0, 0.5, -1.0]]
+        assert len(embeddings.inputs) == 1
+        ai_service.get_embeddings(["lakes", "seas"])
+        assert embeddings.inputs[-1] == ["seas"]
+
+        # Test 4: A new service instance picks the embeddings up from disk
+        logger.info("💾 Test 4: Shared between instances...")
+        ai_service.embedding_cache.close()
+        ai_service.completion_cache.close()
+        ai_service = AIService(Config(data_dir=data_dir), client)
+        ai_service.get_embeddings(["rivers", "lakes", "seas"])
+        assert len(embeddings.inputs) == 2
+        ai_service.embedding_cache.close()
+        ai_service.completion_cache.close()
+
+    logger.info("✅ Embedding cache tests completed!")
+
+if __name__ == "__main__":
+    test_embedding_cache()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for packing embeddings and preferences for storage
+Runs offline, no API keys needed
+"""
+
+import json
+import numpy as np
+from logger import get_logger
+from preference_matrix import PreferenceMatrix
+from embedding_codec import (
+    encode_embedding, decode_embedding, encode_preferences, decode_preferences,
+    encode_preferences_delta, apply_preferences_delta, is_packed_preferences, is_preferences_delta,
+)
+
+def test_embedding_codec() -> None:
+    """Test round trips in both dtypes, legacy rows, deltas and malformed payloads"""
+    logger = get_logger()
+    logger.info("🧪 Testing embedding codec...")
+    rng = np.random.default_rng(7)
+
+    # Test 1: Embeddings round-trip exactly as float32 and within half precision as float16
+    logger.info("📦 Test 1: Embedding round trips...")
+    embedding = rng.standard_normal(64).astype(np.float32)
+    decoded = decode_embedding(encode_embedding(embedding))
+    assert decoded.dtype == np.float32 and np.array_equal(decoded, embedding)
+    decoded = decode_embedding(encode_embedding(embedding.tolist(), "float16"), "float16")
+    assert decoded.dtype == np.float32 and np.allclose(decoded, embedding, atol=1e-2)
+    assert len(encode_embedding(embedding, "float16")) < len(encode_embedding(embedding))
+
+    # Test 2: Preferences round-trip in the packed-v1 format
+    logger.info("🗜️ Test 2: Preference round trips...")
+    preferences = PreferenceMatrix.from_arrays(["rivers", "lakes", "seas"], rng.standard_normal((3, 16)), [2, -1, 0.5], [100, 200, 300])
+    for dtype, tolerance in (("float32", 1e-7), ("float16", 1e-2)):
+        stored = json.loads(json.dumps(encode_preferences(preferences, dtype)))
+        assert is_packed_preferences(stored) and stored["dtype"] == dtype
+        decoded = decode_preferences(stored)
+        assert decoded.keywords == preferences.keywords and decoded.dimensions == 16
+        assert [decoded.get_score(keyword) for keyword in decoded.keywords] == [2, -1, 0.5]
+        assert [decoded.get_updated_at(keyword) for keyword in decoded.keywords] == [100, 200, 300]
+        assert np.allclose(decoded.embeddings, preferences.embeddings, atol=tolerance)
+    assert len(decode_preferences(encode_preferences(PreferenceMatrix(16)))) == 0
+
+    # Test 3: Legacy JSON rows, as a dict or a string, still decode
+    logger.info("📜 Test 3: Legacy rows...")
+    legacy = {"rivers": {"score": 3, "embedding": [3.0, 4.0]}, "lakes": 1}
+    for stored in (legacy, json.dumps(legacy)):
+        decoded = decode_preferences(stored)
+        assert not is_packed_preferences(stored)
+        assert decoded.keywords == ["rivers", "lakes"] and decoded.get_score("lakes") == 1
+        assert np.allclose(decoded.get_embedding("rivers"), [0.6, 0.8])
+        assert not decoded.has_embedding("lakes")
+
+    # Test 4: A delta applied to its base gives back the new preferences
+    logger.info("🔺 Test 4: Deltas...")
+    updated = preferences.copy()
+    updated.set_score("rivers", 5, 400)
+    updated.remove(["lakes"])
+    updated.add("ponds", 1, rng.standard_normal(16), 500)
+    delta = json.loads(json.dumps(encode_preferences_delta(preferences, updated, base_version=7)))
+    assert is_preferences_delta(delta) and delta["base_version"] == 7
+    assert delta["removed"] == ["lakes"] and delta["scores"] == {"rivers": 5} and delta["added"]["keywords"] == ["ponds"]
+    applied = apply_preferences_delta(preferences, delta)
+    assert sorted(applied.keywords) == sorted(updated.keywords)
+    assert all(applied.get_score(k) == updated.get_score(k) and applied.get_updated_at(k) == updated.get_updated_at(k) for k in updated.keywords)
+    assert np.allclose(applied.get_embedding("ponds"), updated.get_embedding("ponds"))
+    assert "lakes" in preferences  # The base is left alone
+
+    # Test 5: Malformed payloads and bare deltas are rejected instead of decoding to garbage
+    logger.info("🚫 Test 5: Malformed payloads...")
+    packed = encode_preferences(preferences)
+    malformed = [
+        delta,
+        {**packed, "embeddings": packed["embeddings"][:-8]},
+        {**packed, "embeddings": "not base64!"},
+        {**packed, "dtype": "float64"},
+        {key: value for key, value in packed.items() if key != "keywords"},
+        "{not json",
+    ]
+    for stored in malformed:
+        try:
+            decode_preferences(stored)
+            assert False, f"Decoding {str(stored)[:40]} should have failed"
+        except (ValueError, KeyError):
+            pass
+
+    logger.info("✅ Embedding codec tests completed!")
+
+if __name__ == "__main__":
+    test_embedding_codec()
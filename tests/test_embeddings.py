@@ -8,6 +8,7 @@ from config import Config
 from services.ai_service import AIService
 from stores.preferences_store import PreferencesStore
 from logger import get_logger
+from vector_index import normalize
 from _types import PreferencesWithEmbeddings
 
 def test_embeddings() -> None:
@@ -34,8 +35,8 @@ def test_embeddings() -> None:
     ml_embedding = ai_service.get_embedding("machine learning")
     politics_embedding = ai_service.get_embedding("politics")
 
-    ai_ml_similarity = ai_service.cosine_similarity(ai_embedding, ml_embedding)
-    ai_politics_similarity = ai_service.cosine_similarity(ai_embedding, politics_embedding)
+    ai_ml_similarity = float(normalize(ai_embedding) @ normalize(ml_embedding))
+    ai_politics_similarity = float(normalize(ai_embedding) @ normalize(politics_embedding))
 
     logger.info(f"  AI vs ML similarity: {ai_ml_similarity:.3f}")
     logger.info(f"  AI vs Politics similarity: {ai_politics_similarity:.3f}")
@@ -80,13 +81,14 @@ def test_embeddings() -> None:
         }
     ]
 
-    selected_article = ai_service.select_best_article_with_embeddings(
+    selected_articles = ai_service.select_top_articles_with_embeddings(
         sample_articles,
-        sample_preferences
+        sample_preferences,
+        1
     )
 
-    if selected_article:
-        logger.info(f"  Selected article: {selected_article['title']}")
+    if selected_articles:
+        logger.info(f"  Selected article: {selected_articles[0]['title']}")
     else:
         logger.info("  No article selected")
 
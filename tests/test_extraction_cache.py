@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk extraction cache and conditional revalidation
+Runs offline against a local HTTP server, no API keys needed
+"""
+
+import os
+import datetime
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logger import get_logger
+from caches import ExtractionCache
+from utils import extract_article_content
+
+PARAGRAPH = "The committee met on Tuesday to discuss the new transit plan for the city, which adds three bus lines and extends the tram. "
+ARTICLE_HTML = f"<html><head><title>Transit plan approved</title></head><body><article><h1>Transit plan approved</h1><p>{PARAGRAPH * 4}</p><p>{PARAGRAPH * 3}</p></article></body></html>".encode()
+
+class ArticleHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self) -> None:
+        not_modified = self.headers.get('If-None-Match') == '"v1"'
+        ArticleHandler.requests.append(304 if not_modified else 200)
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', '"v1"')
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(ARTICLE_HTML)))
+        self.end_headers()
+        self.wfile.write(ARTICLE_HTML)
+
+    def log_message(self, *args) -> None:
+        pass
+
+def test_extraction_cache() -> None:
+    """Test caching extracted articles, serializing them, and revalidating with ETags"""
+    logger = get_logger()
+    logger.info("🧪 Testing extraction cache...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ArticleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/transit"
+
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = os.path.join(data_dir, "extractions.sqlite3")
+
+            # Test 1: Entries round-trip, including the publish date
+            logger.info("💾 Test 1: Round trip...")
+            cache = ExtractionCache(path, max_entries=10, ttl=60, max_age=600)
+            published = datetime.datetime(2024, 5, 1, 12, 30)
+            cache.put("https://example.com/a", {"title": "A", "content": "Text", "authors": ["Ann"], "publish_date": published, "top_image": None, "url": "https://example.com/a"}, etag='"abc"')
+            cached = cache.get("https://example.com/a")
+            assert cached.article["publish_date"] == published and cached.article["authors"] == ["Ann"]
+            assert cached.conditional_headers() == {"If-None-Match": '"abc"'}
+            assert cache.get("https://example.com/missing") is None
+
+            # Test 2: A fresh entry is used without touching the network
+            logger.info("📚 Test 2: Fresh entries...")
+            first = extract_article_content(url, cache)
+            assert first and "transit plan" in first["content"]
+            assert extract_article_content(url, cache)["content"] == first["content"]
+            assert ArticleHandler.requests == [200]
+            cache.close()
+
+            # Test 3: Past the TTL the entry is revalidated, and reused on 304
+            logger.info("🔁 Test 3: Revalidation...")
+            stale = ExtractionCache(path, max_entries=10, ttl=0, max_age=600)
+            assert extract_article_content(url, stale)["content"] == first["content"]
+            assert ArticleHandler.requests == [200, 304]
+            assert stale.stats()["revalidated"] == 1 and stale.stats()["downloaded"] == 0
+            stale.close()
+    finally:
+        server.shutdown()
+
+    logger.info("✅ Extraction cache tests completed!")
+
+if __name__ == "__main__":
+    test_extraction_cache()
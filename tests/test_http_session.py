@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared HTTP session's retry policy
+Runs offline against a local HTTP server, no API keys needed
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http_session
+from logger import get_logger
+from http_session import get_session
+from utils import extract_article_content
+
+class BusyHandler(BaseHTTPRequestHandler):
+    """Answers 503 with a very long Retry-After until `busy` requests were made"""
+    busy = 0
+    requests = 0
+
+    def do_GET(self) -> None:
+        BusyHandler.requests += 1
+        if BusyHandler.requests <= BusyHandler.busy:
+            self.send_response(503)
+            self.send_header('Retry-After', '3600')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args) -> None:
+        pass
+
+def test_http_session() -> None:
+    """Test that Retry-After is honoured but capped, and busy servers aren't retried per user agent"""
+    logger = get_logger()
+    logger.info("🧪 Testing HTTP session...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BusyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/story"
+    max_retry_after = http_session.HTTP_MAX_RETRY_AFTER
+    http_session.HTTP_MAX_RETRY_AFTER = 0.2
+
+    try:
+        # Test 1: A server asking for an hour's pause only gets the capped wait before the retry
+        logger.info("⏳ Test 1: Capped Retry-After...")
+        BusyHandler.busy, BusyHandler.requests = 1, 0
+        started = time.perf_counter()
+        response = get_session().get(url)
+        assert response.status_code == 200 and BusyHandler.requests == 2
+        assert 0.2 <= time.perf_counter() - started < 5
+
+        # Test 2: Article downloads give up once the session's retries are spent, instead of starting over per user agent
+        logger.info("🛑 Test 2: Busy article servers...")
+        BusyHandler.busy, BusyHandler.requests = 100, 0
+        started = time.perf_counter()
+        assert extract_article_content(url) is None
+        assert BusyHandler.requests == http_session.HTTP_RETRIES + 1
+        assert time.perf_counter() - started < 5
+    finally:
+        http_session.HTTP_MAX_RETRY_AFTER = max_retry_after
+        server.shutdown()
+
+    logger.info("✅ HTTP session tests completed!")
+
+if __name__ == "__main__":
+    test_http_session()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for generating article images in the background and backfilling them
+Runs offline with stub services, no API keys needed
+"""
+
+import datetime
+from logger import get_logger
+from config import Config
+from caches import PageCache, CachedPage
+from services import NotificationService
+from image_backfill import ImageBackfillWorker, is_image_pending
+
+class StubAIService:
+    def __init__(self, image_url: str) -> None:
+        self.image_url = image_url
+
+    def generate_image(self, title: str, summary: str) -> str:
+        if self.image_url == "error":
+            raise RuntimeError("image service down")
+        return self.image_url
+
+class StubArticlesStore:
+    def __init__(self) -> None:
+        self.images = {}
+
+    def update_image_url(self, article_id: str, image_url: str) -> bool:
+        self.images[article_id] = image_url
+        return True
+
+def test_image_backfill() -> None:
+    """Test the pending state and backfilling images into stored articles"""
+    logger = get_logger()
+    logger.info("🧪 Testing image backfill...")
+
+    # Test 1: None is pending only for recently stored articles, "" means no image
+    logger.info("⏳ Test 1: Pending state...")
+    now = datetime.datetime.now()
+    assert is_image_pending({"image_url": None, "created_at": now.isoformat()})
+    assert not is_image_pending({"image_url": None, "created_at": (now - datetime.timedelta(hours=1)).isoformat()})
+    assert not is_image_pending({"image_url": "", "created_at": now.isoformat()})
+    assert not is_image_pending({"image_url": "https://example.com/a.png", "created_at": now.isoformat()})
+    assert not is_image_pending({"image_url": None})
+
+    # Test 2: A generated image is stored and the cached page dropped
+    logger.info("🖼️ Test 2: Backfill...")
+    page_cache = PageCache(1 << 20)
+    articles_store = StubArticlesStore()
+    page_cache.put("a1", CachedPage.build("<html></html>", datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)))
+    worker = ImageBackfillWorker(StubAIService("https://example.com/a.png"), articles_store, page_cache)
+    assert worker.submit("a1", "Title", "Summary").result(timeout=5) == "https://example.com/a.png"
+    assert articles_store.images == {"a1": "https://example.com/a.png"}
+    assert page_cache.get("a1") is None
+    worker.stop()
+
+    # Test 3: The email goes out once the image is ready, and shows it
+    logger.info("📧 Test 3: Email with the image...")
+    notification_service = NotificationService(Config(email_enabled=True))
+    sent = []
+    notification_service._send_email = lambda subject, body, body_html: sent.append(body_html)
+    article = {"title": "Title", "description": "Description", "url": "https://example.com/story"}
+    worker = ImageBackfillWorker(StubAIService("https://example.com/b.png"), articles_store, page_cache)
+    worker.submit("a3", "Title", "Summary", on_ready=lambda image_url: notification_service.send_email(article, "Summary", "Subject", image_url, "a3")).result(timeout=5)
+    worker.stop()
+    assert len(sent) == 1 and '<img src="https://example.com/b.png"' in sent[0]
+
+    # Test 4: A failed generation stores "" so the page stops waiting
+    logger.info("❌ Test 4: Failure...")
+    worker = ImageBackfillWorker(StubAIService("error"), articles_store, page_cache)
+    assert worker.submit("a2", "Title", "Summary").result(timeout=5) == ""
+    assert articles_store.images["a2"] == "" and worker.stats()["failed"] == 1
+    worker.stop()
+
+    logger.info("✅ Image backfill tests completed!")
+
+if __name__ == "__main__":
+    test_image_backfill()
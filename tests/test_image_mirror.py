@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for mirroring article images as resized local variants
+Runs offline against a local HTTP server, no API keys needed
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from logger import get_logger
+from config import Config
+from caches import PageCache
+from services import NotificationService
+from image_mirror import ImageMirror
+from image_backfill import ImageBackfillWorker
+
+ARTICLE_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+def png_bytes(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.radial_gradient("L").resize((width, height)).convert("RGB").save(buffer, "PNG")
+    return buffer.getvalue()
+
+class StubAIService:
+    def __init__(self, image_url: str) -> None:
+        self.image_url = image_url
+
+    def generate_image(self, title: str, summary: str) -> str:
+        return self.image_url
+
+class StubArticlesStore:
+    def update_image_url(self, article_id: str, image_url: str) -> bool:
+        return True
+
+class ImageHandler(BaseHTTPRequestHandler):
+    body = png_bytes(1792, 1024)
+
+    def do_GET(self) -> None:
+        found = self.path == "/image.png"
+        self.send_response(200 if found else 404)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(self.body) if found else 0))
+        self.end_headers()
+        if found:
+            self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+def test_image_mirror() -> None:
+    """Test downloading, resizing and referencing mirrored images"""
+    logger = get_logger()
+    logger.info("🧪 Testing image mirror...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            mirror = ImageMirror(Config(data_dir=data_dir, domain="https://news.example"))
+
+            # Test 1: Variants are written at every width up to the largest, in both formats
+            logger.info("🗜️ Test 1: Mirroring...")
+            assert mirror.mirror(ARTICLE_ID, f"{base_url}/image.png") == f"https://news.example/images/{ARTICLE_ID}/960.jpg"
+            assert mirror.variants(ARTICLE_ID) == {"jpg": [480, 960, 1440], "webp": [480, 960, 1440]}
+            with Image.open(os.path.join(mirror.directory(ARTICLE_ID), "480.webp")) as small:
+                assert small.size == (480, 274)
+            assert os.path.getsize(os.path.join(mirror.directory(ARTICLE_ID), "480.jpg")) < len(ImageHandler.body) / 4
+
+            # Test 2: Mirrored images get srcset variants, others a plain <img>
+            logger.info("🖼️ Test 2: HTML...")
+            html = str(mirror.image_html(f"https://news.example/images/{ARTICLE_ID}/960.jpg", "100vw"))
+            assert '<source type="image/webp"' in html and f"/images/{ARTICLE_ID}/1440.webp 1440w" in html
+            assert 'webp' not in str(mirror.image_html(f"https://news.example/images/{ARTICLE_ID}/960.jpg", "100vw", webp=False))
+            assert str(mirror.image_html("https://cdn.example/x.png", "100vw")) == '<img src="https://cdn.example/x.png" alt="Article image" class="image">'
+            assert str(mirror.image_html(None, "100vw")) == ''
+
+            # Test 3: The email sent after backfilling links the mirrored JPEG variants
+            logger.info("📧 Test 3: Email...")
+            email_article_id = ARTICLE_ID.replace("0f8f", "2f8f")
+            config = Config(data_dir=data_dir, domain="https://news.example", email_enabled=True)
+            notification_service = NotificationService(config, mirror)
+            sent = []
+            notification_service._send_email = lambda subject, body, body_html: sent.append(body_html)
+            article = {"title": "Title", "description": "Description", "url": "https://example.com/story"}
+            worker = ImageBackfillWorker(StubAIService(f"{base_url}/image.png"), StubArticlesStore(), PageCache(1 << 20), mirror)
+            worker.submit(email_article_id, "Title", "Summary", on_ready=lambda image_url: notification_service.send_email(article, "Summary", "Subject", image_url, email_article_id)).result(timeout=30)
+            worker.stop()
+            assert len(sent) == 1
+            assert f'srcset="https://news.example/images/{email_article_id}/480.jpg 480w' in sent[0] and ".webp" not in sent[0]
+            shutil.rmtree(mirror.directory(email_article_id))
+
+            # Test 4: Failures leave nothing behind, and old images are cleaned up
+            logger.info("🧹 Test 3: Failures and cleanup...")
+            other_id = ARTICLE_ID.replace("0f8f", "1f8f")
+            assert mirror.mirror(other_id, f"{base_url}/missing.png") == ""
+            assert os.listdir(mirror.root) == [ARTICLE_ID]
+            os.utime(mirror.directory(ARTICLE_ID), (0, 0))
+            mirror.cleanup(30)
+            assert os.listdir(mirror.root) == []
+    finally:
+        server.shutdown()
+
+    logger.info("✅ Image mirror tests completed!")
+
+if __name__ == "__main__":
+    test_image_mirror()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for collapsing near-duplicate stories with MinHash/LSH
+Runs offline, no API keys needed
+"""
+
+from logger import get_logger
+from near_duplicates import NearDuplicateIndex, collapse_near_duplicates
+
+def test_near_duplicates() -> None:
+    """Test clustering near-identical texts and collapsing articles into stories"""
+    logger = get_logger()
+    logger.info("🧪 Testing near-duplicate collapsing...")
+
+    # Test 1: Reworded copies of a story cluster together, other stories don't
+    logger.info("🧬 Test 1: Clustering...")
+    index = NearDuplicateIndex(threshold=0.6)
+    first = index.add("Central bank raises interest rates by half a point to fight inflation")
+    assert index.add("Central bank raises interest rates by half a point to fight inflation - Reuters") == first
+    assert index.add("Central Bank raises interest rates by half-a-point to fight inflation!") == first
+    assert index.add("Local team wins championship after dramatic overtime finish") != first
+    assert index.add("") != index.add("")  # Empty texts never match anything
+
+    # Test 2: Articles collapse into one per story, keeping the preferred source
+    logger.info("📰 Test 2: Collapsing articles...")
+    articles = [
+        {"title": "Rover finds signs of ancient water on Mars", "description": "The rover drilled into a crater floor.", "source": {"name": "Daily Blog"}, "url": "https://dailyblog.example/mars"},
+        {"title": "Local elections see record turnout", "description": "Polling stations stayed open late.", "source": {"name": "Town News"}, "url": "https://townnews.example/vote"},
+        {"title": "Rover finds signs of ancient water on Mars", "description": "The rover drilled into a crater floor!", "source": {"name": "Reuters"}, "url": "https://www.reuters.com/mars"},
+        {"title": "Rover finds sign of ancient water on Mars", "description": "The rover drilled into a crater floor.", "source": {"name": "Other"}, "url": "https://other.example/mars"},
+    ]
+    stories = list(collapse_near_duplicates(articles, 0.6, ["bbc.co.uk", "reuters.com"]))
+    assert [story["title"] for story in stories] == [articles[0]["title"], articles[1]["title"]]
+    assert stories[0]["source"]["name"] == "Reuters" and stories[0]["cluster_size"] == 3
+    assert stories[1]["cluster_size"] == 1
+    assert "cluster_size" not in articles[2]  # Inputs are left alone
+
+    logger.info("✅ Near-duplicate tests completed!")
+
+if __name__ == "__main__":
+    test_near_duplicates()
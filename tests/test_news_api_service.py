@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-query, paginated news ingestion
+Pages are served by a stub, so no NewsAPI key is needed
+"""
+
+import time
+import tempfile
+import threading
+from config import Config
+from logger import get_logger
+from http_session import RateLimiter
+from preference_matrix import PreferenceMatrix
+from services import NewsApiService
+
+class StubNewsApiService(NewsApiService):
+    """Serves 3 pages of 100 results per query from NewsAPI, sharing some URLs between queries"""
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def _request_page(self, query, from_date, to_date, page):
+        with self.lock:
+            self.requests.append((query, page))
+        articles = [{"title": f"{query} {page} {i}", "url": f"https://news.example/{page}/{i}" if i < 2 else f"https://news.example/{query}/{page}/{i}"} for i in range(5)]
+        return articles, 300
+
+def test_news_api_service() -> None:
+    """Test query derivation, pagination, URL deduplication, the response cache and the rate limiter"""
+    logger = get_logger()
+    logger.info("🧪 Testing news ingestion...")
+
+    config = Config()
+    config.data_dir = tempfile.mkdtemp()
+    config.news_queries = "world, tech"
+    config.news_preference_queries = 2
+    config.news_max_pages = 2
+    config.news_requests_per_second = 0
+    service = StubNewsApiService(config)
+
+    # Test 1: Queries come from the config and the top liked preferences
+    logger.info("🔎 Test 1: Queries...")
+    preferences = PreferenceMatrix(4)
+    for keyword, score in (("politics", -5), ("space", 3), ("artificial intelligence", 5), ("cats", 1)):
+        preferences.add(keyword, score, [1, 0, 0, 0])
+    queries = service.queries_for(preferences)
+    assert queries == ["world", "tech", '"artificial intelligence"', "space"]
+    assert service.queries_for() == ["world", "tech"]
+
+    # Test 2: Every query is paged up to the limit, and repeated URLs only come through once
+    logger.info("📄 Test 2: Pages...")
+    articles = list(service.iter_articles(queries))
+    assert sorted(service.requests) == sorted((query, page) for query in queries for page in (1, 2))
+    urls = [article["url"] for article in articles]
+    assert len(urls) == len(set(urls)) == 2 * 2 + 4 * 2 * 3
+
+    # Test 3: Stopping early doesn't wait for the remaining pages
+    logger.info("✋ Test 3: Early stop...")
+    stream = service.iter_articles(queries)
+    assert next(stream)["url"]
+    stream.close()
+
+    # Test 4: Repeated fetches come from the cache, unless refreshed
+    logger.info("📦 Test 4: Response cache...")
+    service.requests.clear()
+    pages = []
+    assert len(list(service.iter_articles(queries, on_page=lambda *page: pages.append(page)))) == len(urls)
+    assert service.requests == []
+    assert sorted(pages) == sorted((query, page, 5, "cached") for query in queries for page in (1, 2))
+
+    assert len(list(service.iter_articles(queries, refresh=True))) == len(urls)
+    assert len(service.requests) == 8
+
+    # Stale pages are served straight away and refreshed in the background
+    service.requests.clear()
+    config.news_cache_ttl = 0
+    assert len(list(service.iter_articles(["world"]))) == 2 * 5
+    for _ in range(50):
+        if len(service.requests) == 2:
+            break
+        time.sleep(0.02)
+    assert sorted(service.requests) == [("world", 1), ("world", 2)]
+    service.close()
+
+    # Test 5: The rate limiter spreads calls out after the burst
+    logger.info("⏱️ Test 5: Rate limiter...")
+    limiter = RateLimiter(rate=50, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    elapsed = time.monotonic() - started
+    assert 0.07 < elapsed < 0.5, f"unexpected rate limiting: {elapsed:.3f}s"
+
+    logger.info("✅ News ingestion tests completed!")
+
+if __name__ == "__main__":
+    test_news_api_service()
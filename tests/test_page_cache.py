@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the rendered page cache and conditional article requests
+Runs offline with stub services, no API keys needed
+"""
+
+import datetime
+import newsbot
+from logger import get_logger
+from caches import PageCache, CachedPage
+from image_mirror import ImageMirror
+from config import Config
+
+class StubArticlesStore:
+    def __init__(self, articles: dict) -> None:
+        self.articles = articles
+        self.reads = 0
+
+    def get_article(self, article_id: str, columns: str = "*") -> dict:
+        self.reads += 1
+        return self.articles.get(article_id)
+
+class StubContainer:
+    def __init__(self, articles: dict) -> None:
+        self.page_cache = PageCache(1 << 20)
+        self.articles_store = StubArticlesStore(articles)
+        self.image_mirror = ImageMirror(Config())
+
+def test_page_cache() -> None:
+    """Test byte-bounded LRU eviction and ETag revalidation of article pages"""
+    logger = get_logger()
+    logger.info("🧪 Testing page cache...")
+    expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+
+    # Test 1: The least recently used pages are evicted once the byte budget is exceeded
+    logger.info("🧹 Test 1: Byte-budget eviction...")
+    cache = PageCache(300)
+    for key in ("a", "b", "c"):
+        cache.put(key, CachedPage.build(key * 100, expires_at))
+    assert cache.get("a") is not None  # Now "b" is the least recently used
+    cache.put("d", CachedPage.build("d" * 100, expires_at))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    cache.put("e", CachedPage.build("e" * 250, expires_at))
+    assert [key for key in "acde" if cache.get(key) is not None] == ["e"]
+    assert cache.stats()["bytes"] == 250
+
+    # Test 2: Pages larger than the budget and expired pages are never served
+    logger.info("📏 Test 2: Oversized and expired pages...")
+    cache.put("huge", CachedPage.build("x" * 301, expires_at))
+    assert cache.get("huge") is None and cache.get("e") is not None
+    cache.put("old", CachedPage.build("old", datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)))
+    assert cache.get("old") is None
+
+    # Test 3: A repeat request with the page's ETag gets a 304 without touching the database
+    logger.info("🏷️ Test 3: Conditional requests...")
+    stored = {
+        "title": "Transit <plan> approved",
+        "created_at": "2026-01-02T10:00:00",
+        "expires_at": expires_at.replace(tzinfo=None).isoformat(),
+        "image_url": "",
+        "summary": "Three new bus lines.",
+        "content": "First paragraph.\n\nSecond paragraph.",
+        "url": "https://example.com/transit",
+    }
+    now = datetime.datetime.now().isoformat()
+    services = StubContainer({"a1": stored, "a2": {**stored, "image_url": None, "created_at": now}})
+    get_container = newsbot.get_container
+    newsbot.get_container = lambda: services
+    try:
+        client = newsbot.app.test_client()
+        first = client.get("/article/a1")
+        assert first.status_code == 200 and first.headers["ETag"]
+        assert b"Transit &lt;plan&gt; approved" in first.data
+        assert services.articles_store.reads == 1
+
+        second = client.get("/article/a1", headers={"If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 304 and second.data == b""
+        assert services.articles_store.reads == 1
+
+        assert client.get("/article/a1", headers={"If-None-Match": '"stale"'}).status_code == 200
+        assert client.get("/article/missing").status_code == 404
+
+        # Test 4: A page still waiting for its image is neither cached by us nor by browsers
+        logger.info("⏳ Test 4: Pending images...")
+        pending = client.get("/article/a2")
+        assert pending.status_code == 200 and b"still being drawn" in pending.data
+        assert "no-cache" in pending.headers["Cache-Control"]
+        assert services.page_cache.get("a2") is None
+        client.get("/article/a2")
+        assert services.articles_store.reads == 4
+    finally:
+        newsbot.get_container = get_container
+
+    logger.info("✅ Page cache tests completed!")
+
+if __name__ == "__main__":
+    test_page_cache()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the stage pipeline that schedules each /trigger run
+Runs offline, no API keys needed
+"""
+
+import time
+import threading
+from logger import get_logger
+from pipeline import Pipeline, Stage
+
+def test_pipeline() -> None:
+    """Test dependency order, concurrency, validation, failures and timings"""
+    logger = get_logger()
+    logger.info("🧪 Testing pipeline...")
+
+    # Test 1: Stages get their dependencies' results and run after them
+    logger.info("🔗 Test 1: Dependency order...")
+    order = []
+    def record(name, value):
+        def run(**arguments):
+            order.append(name)
+            return value + sum(arguments.values())
+        return run
+    pipeline = Pipeline("order", [
+        Stage("total", record("total", 0), ("left", "right")),
+        Stage("left", record("left", 1), ("base",)),
+        Stage("right", record("right", 2), ("base",)),
+        Stage("base", record("base", 10)),
+    ])
+    results = pipeline.run()
+    assert results == {"base": 10, "left": 11, "right": 12, "total": 23}
+    assert order[0] == "base" and order[-1] == "total"
+
+    # Test 2: Independent stages run at the same time
+    logger.info("🔀 Test 2: Concurrency...")
+    barrier = threading.Barrier(2, timeout=5)  # Breaks if the stages ran one after the other
+    pipeline = Pipeline("concurrent", [Stage("first", barrier.wait), Stage("second", barrier.wait)], max_workers=2)
+    assert sorted(pipeline.run().values()) == [0, 1]
+
+    # Test 3: Cycles, unknown dependencies and duplicate names are rejected when the pipeline is built
+    logger.info("🚫 Test 3: Validation...")
+    invalid = [
+        [Stage("a", lambda b: b, ("b",)), Stage("b", lambda a: a, ("a",))],
+        [Stage("a", lambda a: a, ("a",))],
+        [Stage("a", lambda missing: missing, ("missing",))],
+        [Stage("a", lambda: 1), Stage("a", lambda: 2)],
+    ]
+    for stages in invalid:
+        try:
+            Pipeline("invalid", stages)
+            assert False, f"Pipeline with {[stage.name for stage in stages]} should have been rejected"
+        except ValueError:
+            pass
+
+    # Test 4: A failing stage's error propagates, and stages depending on it never run
+    logger.info("💥 Test 4: Failures...")
+    ran = []
+    def fail():
+        raise RuntimeError("extraction failed")
+    pipeline = Pipeline("failing", [
+        Stage("fail", fail),
+        Stage("after", lambda fail: ran.append("after"), ("fail",)),
+    ])
+    try:
+        pipeline.run()
+        assert False, "The stage's error should have propagated"
+    except RuntimeError as e:
+        assert str(e) == "extraction failed"
+    assert ran == []
+
+    # Test 5: Every stage's duration is recorded
+    logger.info("⏱️ Test 5: Timings...")
+    pipeline = Pipeline("timed", [Stage("slow", lambda: time.sleep(0.05)), Stage("fast", lambda slow: None, ("slow",))])
+    pipeline.run()
+    assert set(pipeline.timings) == {"slow", "fast"}
+    assert pipeline.timings["slow"] >= 0.05 and pipeline.timings["fast"] < pipeline.timings["slow"]
+
+    logger.info("✅ Pipeline tests completed!")
+
+if __name__ == "__main__":
+    test_pipeline()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for preference compaction: decay, near-duplicate merging and the size ceiling
+Runs offline, no API keys needed
+"""
+
+import numpy as np
+from config import Config
+from logger import get_logger
+from preference_matrix import PreferenceMatrix
+from preference_compaction import compact_preferences, SECONDS_PER_DAY
+from embedding_codec import encode_preferences, decode_preferences, encode_preferences_delta, apply_preferences_delta
+
+def test_preference_compaction() -> None:
+    """Test decay and pruning, merging near-duplicates, trimming and update times in storage"""
+    logger = get_logger()
+    logger.info("🧪 Testing preference compaction...")
+
+    config = Config()
+    config.preference_half_life_days = 10
+    config.preference_prune_below = 0.5
+    config.preference_merge_threshold = 0.9
+    config.preference_max_count = 100
+
+    rng = np.random.default_rng(11)
+    now = 1_700_000_000
+    ai = rng.standard_normal(16)
+
+    preferences = PreferenceMatrix(16)
+    preferences.add("ai", 4, ai, now)
+    preferences.add("artificial intelligence", 3, ai + 0.05 * rng.standard_normal(16), now - 5 * SECONDS_PER_DAY)
+    preferences.add("ai hype", -2, ai + 0.05 * rng.standard_normal(16), now)
+    preferences.add("gardening", 2, rng.standard_normal(16), now - 30 * SECONDS_PER_DAY)
+    preferences.add("politics", -4, rng.standard_normal(16), now - 10 * SECONDS_PER_DAY)
+    preferences.add("legacy", 3, rng.standard_normal(16), 0)
+
+    # Test 1: Decay halves a score every half-life and prunes scores near zero
+    logger.info("⏳ Test 1: Decay...")
+    compacted, result = compact_preferences(preferences, config, now)
+    assert "gardening" not in compacted  # 2 -> 0.25 after three half-lives
+    assert np.isclose(compacted.get_score("politics"), -2)
+    assert compacted.get_score("legacy") == 3 and compacted.get_updated_at("legacy") == now
+    assert result.pruned == 1
+
+    # Test 2: Same-sign near-duplicates merge into the strongest, opposite signs don't
+    logger.info("🔗 Test 2: Merge...")
+    assert "artificial intelligence" not in compacted and "ai hype" in compacted
+    assert compacted.get_score("ai") == 5  # 4 + 3 * 0.5^0.5, clamped to 5
+    assert result.merged == 1 and result.after == len(compacted) == 4
+    assert len(preferences) == 6  # The input is left alone
+
+    # Test 3: The size ceiling drops the weakest preferences
+    logger.info("✂️ Test 3: Size ceiling...")
+    config.preference_max_count = 2
+    trimmed, result = compact_preferences(preferences, config, now)
+    assert list(trimmed.keys()) == ["ai", "legacy"]
+    assert result.trimmed == 2 and len(trimmed) == 2
+
+    # Test 4: Update times survive snapshots and deltas
+    logger.info("💾 Test 4: Storage...")
+    restored = decode_preferences(encode_preferences(compacted))
+    assert restored.get_updated_at("ai") == compacted.get_updated_at("ai")
+
+    changed = restored.copy()
+    changed.set_score("politics", -1, now + 60)
+    applied = apply_preferences_delta(restored, encode_preferences_delta(restored, changed, 1))
+    assert applied.get_score("politics") == -1 and applied.get_updated_at("politics") == now + 60
+
+    logger.info("✅ Preference compaction tests completed!")
+
+if __name__ == "__main__":
+    test_preference_compaction()
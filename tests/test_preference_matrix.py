@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the PreferenceMatrix representation of preferences
+Runs offline, no API keys needed
+"""
+
+import numpy as np
+from logger import get_logger
+from preference_matrix import PreferenceMatrix
+from _types import PreferencesWithEmbeddings
+
+def test_preference_matrix() -> None:
+    """Test the dict-like API, serialization and vectorized similarity"""
+    logger = get_logger()
+    logger.info("🧪 Testing preference matrix...")
+
+    rng = np.random.default_rng(42)
+    preferences: PreferencesWithEmbeddings = {
+        "ai": {"score": 5, "embedding": rng.standard_normal(8).tolist()},
+        "gaming": {"score": 4.5, "embedding": rng.standard_normal(8).tolist()},
+        "politics": {"score": -5, "embedding": rng.standard_normal(8).tolist()},
+    }
+
+    # Test 1: Dict-like API
+    logger.info("📝 Test 1: Dict-like API...")
+    matrix = PreferenceMatrix.from_dict(preferences)
+    assert list(matrix.keys()) == ["ai", "gaming", "politics"]
+    assert matrix["gaming"]["score"] == 4.5
+    assert "ai" in matrix and "cats" not in matrix
+
+    matrix["ai"]["score"] = 3
+    assert matrix.get_score("ai") == 3
+
+    matrix["cats"] = {"score": 2, "embedding": rng.standard_normal(8).tolist()}
+    del matrix["politics"]
+    assert list(matrix.keys()) == ["ai", "gaming", "cats"]
+    assert matrix.embeddings.shape == (3, 8)
+
+    # Test 2: Serialization keeps the stored JSON shape
+    logger.info("💾 Test 2: Serialization...")
+    serialized = matrix.to_dict()
+    assert serialized["ai"]["score"] == 3 and isinstance(serialized["ai"]["score"], int)
+    assert len(serialized["cats"]["embedding"]) == 8
+    assert abs(np.linalg.norm(serialized["cats"]["embedding"]) - 1.0) < 1e-5
+
+    # Test 3: Copies are independent
+    logger.info("📋 Test 3: Copies...")
+    copy = matrix.copy()
+    copy.set_score("ai", -1)
+    assert matrix.get_score("ai") == 3
+
+    # Test 4: Vectorized similarity matches pairwise cosine similarity
+    logger.info("📊 Test 4: Vectorized similarity...")
+    original = PreferenceMatrix.from_dict(preferences)
+    query = rng.standard_normal(8)
+    expected = [
+        np.dot(query, data["embedding"]) / (np.linalg.norm(query) * np.linalg.norm(data["embedding"]))
+        for data in preferences.values()
+    ]
+    assert np.allclose(original.similarities(query), expected, atol=1e-5)
+
+    expected_total = sum(similarity * data["score"] for similarity, data in zip(expected, preferences.values()))
+    assert np.allclose(original.weighted_scores([query])[0], expected_total, atol=1e-4)
+
+    # Test 5: Legacy score-only preferences get a zero embedding
+    logger.info("🕰️ Test 5: Legacy preferences...")
+    legacy = PreferenceMatrix.from_dict({"ai": preferences["ai"], "old": 2})
+    assert legacy.get_score("old") == 2
+    assert not legacy.has_embedding("old")
+    assert legacy.similarities(query)[legacy.row("old")] == 0.0
+
+    logger.info("✅ Preference matrix tests completed!")
+
+if __name__ == "__main__":
+    test_preference_matrix()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the background worker that applies ratings to the preferences
+Uses the in-memory backend and a stub AIService, so no API keys are needed
+"""
+
+import numpy as np
+from config import Config
+from logger import get_logger
+from stores import PreferencesStore, InMemoryPreferencesBackend
+from preference_worker import PreferenceUpdateWorker, RatingUpdate, MAX_UPDATE_ATTEMPTS
+
+class StubAIService:
+    """Adds each rated summary as a keyword, optionally writing a competing version first"""
+
+    def __init__(self, rival_store: PreferencesStore, conflicts: int = 0) -> None:
+        self.rival_store = rival_store
+        self.conflicts = conflicts
+        self.calls = []
+        self.rng = np.random.default_rng(7)
+
+    def update_preferences_from_rating_with_embeddings(self, preferences, rating: int, summary: str):
+        self.calls.append(summary)
+        if self.conflicts:
+            # Another process lands a version between the worker's read and its write
+            self.conflicts -= 1
+            version, rival = self.rival_store.get_preferences_with_version()
+            rival.add(f"rival {self.conflicts}", 1, self.rng.standard_normal(8))
+            assert self.rival_store.update_if_version(version, rival)
+
+        preferences = preferences.copy()
+        preferences.add(summary, rating, self.rng.standard_normal(8))
+        return preferences
+
+def make_worker(conflicts: int = 0):
+    config = Config()
+    config.preference_compaction_interval = 0  # No scheduled compaction during the test
+    backend = InMemoryPreferencesBackend()
+    store = PreferencesStore(config, backend=backend)
+    ai_service = StubAIService(PreferencesStore(config, backend=backend), conflicts)
+    return PreferenceUpdateWorker(ai_service, store), ai_service, store, backend
+
+def test_preference_worker() -> None:
+    """Test coalescing queued ratings, retrying on version conflicts and the worker's stats"""
+    logger = get_logger()
+    logger.info("🧪 Testing preference update worker...")
+
+    # Test 1: Ratings queued while the worker is busy are applied in one batch and one write
+    logger.info("📦 Test 1: Coalescing...")
+    worker, ai_service, store, backend = make_worker()
+    for i in range(4):
+        worker._queue.put_nowait(RatingUpdate(f"a{i}", i + 1, f"summary {i}"))
+    worker.start()
+    worker.stop()
+    assert ai_service.calls == ["summary 0", "summary 1", "summary 2", "summary 3"]
+    assert len(backend.rows) == 1 and backend.rows[0]["preferences"]["_format"] == "packed-v1"
+    version, preferences = store.get_preferences_with_version()
+    assert version == 1 and [preferences.get_score(f"summary {i}") for i in range(4)] == [1, 2, 3, 4]
+
+    stats = worker.stats()
+    assert stats["applied"] == 4 and stats["batches"] == 1 and stats["failed"] == 0 and stats["queue_depth"] == 0
+    assert 0 <= stats["last_lag_seconds"] <= stats["max_lag_seconds"] and stats["avg_lag_seconds"] is not None
+
+    # Test 2: A version written underneath the worker makes it re-apply the ratings on top of it
+    logger.info("⚔️ Test 2: Retrying version conflicts...")
+    worker, ai_service, store, backend = make_worker(conflicts=1)
+    assert worker.submit("a1", 5, "summary")
+    worker.stop()
+    assert ai_service.calls == ["summary", "summary"]
+    version, preferences = store.get_preferences_with_version()
+    assert version == 2 and sorted(preferences.keywords) == ["rival 0", "summary"]
+    assert worker.stats()["applied"] == 1 and worker.stats()["failed"] == 0
+
+    # Test 3: Ratings that keep conflicting are counted as failed, not written
+    logger.info("💥 Test 3: Giving up...")
+    worker, ai_service, store, backend = make_worker(conflicts=MAX_UPDATE_ATTEMPTS)
+    assert worker.submit("a1", 5, "summary")
+    worker.stop()
+    assert len(ai_service.calls) == MAX_UPDATE_ATTEMPTS
+    version, preferences = store.get_preferences_with_version()
+    assert version == MAX_UPDATE_ATTEMPTS and "summary" not in preferences
+    stats = worker.stats()
+    assert stats["applied"] == 0 and stats["failed"] == 1 and stats["batches"] == 0 and stats["avg_lag_seconds"] is None
+
+    logger.info("✅ Preference update worker tests completed!")
+
+if __name__ == "__main__":
+    test_preference_worker()
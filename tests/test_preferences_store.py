@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for preference versioning and compare-and-swap writes in PreferencesStore
+Uses the in-memory backend, so no Supabase connection is needed
+"""
+
+import threading
+import numpy as np
+from config import Config
+from logger import get_logger
+from stores import PreferencesStore, InMemoryPreferencesBackend
+
+def test_preferences_store() -> None:
+    """Test delta versioning, version reconstruction and update_if_version"""
+    logger = get_logger()
+    logger.info("🧪 Testing preferences store...")
+
+    config = Config()
+    config.preferences_snapshot_interval = 3
+    backend = InMemoryPreferencesBackend()
+    store = PreferencesStore(config, backend=backend)
+    rng = np.random.default_rng(7)
+
+    # Test 1: Versions are written as deltas between periodic snapshots
+    logger.info("📝 Test 1: Delta versions...")
+    version, preferences = store.get_preferences_with_version()
+    assert version == 0
+
+    history = []
+    for step in range(1, 8):
+        preferences.add(f"keyword {step}", step, rng.standard_normal(8))
+        if step > 1:
+            preferences.set_score("keyword 1", -step)
+        if step == 5:
+            preferences.remove(["keyword 2"])
+
+        assert store.update_if_version(version, preferences)
+        version += 1
+        history.append(preferences.to_dict())
+
+    formats = [row['preferences']['_format'] for row in backend.rows]
+    assert formats == ['packed-v1', 'delta-v1', 'delta-v1', 'packed-v1', 'delta-v1', 'delta-v1', 'packed-v1']
+    assert [row['is_latest'] for row in backend.rows].count(True) == 1
+
+    # Test 2: Any version can be reconstructed from a fresh store
+    logger.info("🔍 Test 2: Version reconstruction...")
+    fresh_store = PreferencesStore(config, backend=backend)
+    for stored_version, expected in enumerate(history, start=1):
+        reconstructed = fresh_store.get_preferences_version(stored_version).to_dict()
+        assert list(reconstructed) == list(expected)
+        for keyword, data in expected.items():
+            assert reconstructed[keyword]["score"] == data["score"]
+            assert np.allclose(reconstructed[keyword]["embedding"], data["embedding"], atol=1e-6)
+
+    assert fresh_store.get_preferences_version(99) is None
+    assert list(fresh_store.get_preferences_with_embeddings()) == list(history[-1])
+
+    # Test 3: A stale expected version is rejected
+    logger.info("⚔️ Test 3: Compare-and-swap conflicts...")
+    stale_version, stale = fresh_store.get_preferences_with_version()
+    assert store.update_if_version(stale_version, preferences)
+    stale.set_score("keyword 3", 5)
+    assert not fresh_store.update_if_version(stale_version, stale)
+    assert len(backend.rows) == 8
+
+    # Test 4: Concurrent writers racing for the same version, exactly one wins
+    logger.info("🏁 Test 4: Concurrent writers...")
+    expected_version, base = store.get_preferences_with_version()
+    results = []
+
+    def write(score: int) -> None:
+        candidate = base.copy()
+        candidate.set_score("keyword 3", score)
+        results.append(PreferencesStore(config, backend=backend).update_if_version(expected_version, candidate))
+
+    threads = [threading.Thread(target=write, args=(score,)) for score in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert max(row['version'] for row in backend.rows) == expected_version + 1
+
+    # Test 5: Legacy JSON rows still read as snapshots
+    logger.info("🕰️ Test 5: Legacy rows...")
+    legacy_backend = InMemoryPreferencesBackend()
+    legacy_backend.rows.append({'version': 1, 'is_latest': True, 'preferences': {"ai": {"score": 5, "embedding": [1.0, 0.0]}}})
+    legacy_store = PreferencesStore(config, backend=legacy_backend)
+    legacy_version, legacy = legacy_store.get_preferences_with_version()
+    assert legacy_version == 1 and legacy.get_score("ai") == 5
+
+    legacy.add("robots", 3, [0.0, 1.0])
+    assert legacy_store.update_if_version(legacy_version, legacy)
+    assert legacy_backend.rows[-1]['preferences']['_format'] == 'delta-v1'
+    assert list(PreferencesStore(config, backend=legacy_backend).get_preferences_with_embeddings()) == ["ai", "robots"]
+
+    logger.info("✅ Preferences store tests completed!")
+
+if __name__ == "__main__":
+    test_preferences_store()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the seen-URL index that keeps delivered articles out of selection
+Runs offline, no API keys needed
+"""
+
+import os
+import tempfile
+import multiprocessing
+from logger import get_logger
+from caches import SeenUrlIndex
+from caches.seen_urls import normalize_url
+from config import Config
+from stores import ArticlesStore
+from stores import articles_store as articles_store_module
+
+def add_urls(path: str, worker: int) -> None:
+    index = SeenUrlIndex(path)
+    for i in range(25):
+        index.add(f"https://example.com/{worker}/{i}")
+
+class StubTable:
+    """Just enough of a Supabase query to page through article URLs"""
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.ranges = []
+
+    def table(self, name: str) -> 'StubTable':
+        return self
+
+    def select(self, columns: str) -> 'StubTable':
+        return self
+
+    def range(self, start: int, end: int) -> 'StubTable':
+        self.ranges.append((start, end))
+        self.data = self.rows[start:end + 1]
+        return self
+
+    def execute(self) -> 'StubTable':
+        return self
+
+def test_seen_urls() -> None:
+    """Test URL normalization, lookups, filtering and persistence"""
+    logger = get_logger()
+    logger.info("🧪 Testing seen URL index...")
+
+    # Test 1: Tracking parameters, fragments and trailing slashes don't make a URL new
+    logger.info("🔗 Test 1: Normalization...")
+    assert normalize_url("HTTPS://Example.com/story/?utm_source=x&id=3#comments") == "https://example.com/story?id=3"
+    assert normalize_url("https://example.com/story?fbclid=abc") == normalize_url("https://example.com/story/")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "seen_urls.npy")
+
+        # Test 2: Lookups and adding
+        logger.info("👀 Test 2: Lookups...")
+        index = SeenUrlIndex(path)
+        assert len(index) == 0 and "https://example.com/a" not in index
+        assert index.add_many(["https://example.com/a", "https://example.com/b", "https://example.com/a/"]) == 2
+        index.add("https://example.com/c")
+        assert "https://example.com/a?utm_medium=email" in index
+        assert "https://example.com/d" not in index
+        assert None not in index
+
+        # Test 3: Filtering drops seen articles and keeps the rest in order
+        logger.info("🧹 Test 3: Filtering...")
+        articles = [{"url": "https://example.com/b"}, {"url": "https://example.com/d"}, {"url": None}, {"url": "https://example.com/e"}]
+        assert [article["url"] for article in index.filter(articles)] == ["https://example.com/d", None, "https://example.com/e"]
+
+        # Test 4: The index survives a restart, and picks up another process's additions
+        logger.info("💾 Test 4: Persistence...")
+        reloaded = SeenUrlIndex(path)
+        assert len(reloaded) == 3 and "https://example.com/c" in reloaded
+        other = SeenUrlIndex(path)
+        other.add("https://example.com/f")
+        assert list(reloaded.filter([{"url": "https://example.com/f"}])) == []
+
+        # Test 5: A save merges URLs another process saved after our last reload, instead of overwriting them
+        logger.info("🔀 Test 5: Concurrent saves...")
+        racing = SeenUrlIndex(path)
+        racing.reload = lambda: None  # As if the other save landed between our reload and our write
+        other.add("https://example.com/g")
+        racing.add("https://example.com/h")
+        final = SeenUrlIndex(path)
+        assert all(url in final for url in ("https://example.com/f", "https://example.com/g", "https://example.com/h"))
+        assert [name for name in os.listdir(data_dir) if ".tmp" in name] == []
+
+        # Test 6: Worker processes saving at the same time don't drop each other's URLs
+        logger.info("🔒 Test 6: Concurrent processes...")
+        processes = [multiprocessing.get_context("fork").Process(target=add_urls, args=(path, worker)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        final = SeenUrlIndex(path)
+        assert all(f"https://example.com/{worker}/{i}" in final for worker in range(4) for i in range(25))
+
+    # Test 7: Stored URLs are read page by page, and rows without a URL don't shift the pages
+    logger.info("📚 Test 7: Stored URLs...")
+    rows = [{"url": f"https://example.com/{i}" if i % 3 else None} for i in range(10)]
+    supabase = StubTable(rows)
+    page_size = articles_store_module.STORED_URLS_PAGE_SIZE
+    articles_store_module.STORED_URLS_PAGE_SIZE = 4
+    try:
+        urls = ArticlesStore(Config(), supabase).get_stored_urls()
+    finally:
+        articles_store_module.STORED_URLS_PAGE_SIZE = page_size
+    assert urls == [row["url"] for row in rows if row["url"]]
+    assert supabase.ranges == [(0, 3), (4, 7), (8, 11)]
+
+    logger.info("✅ Seen URL index tests completed!")
+
+if __name__ == "__main__":
+    test_seen_urls()
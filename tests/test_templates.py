@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled templates and autoescaping
+Runs offline, no API keys needed
+"""
+
+import os
+import sys
+import tempfile
+import subprocess
+import utils
+from logger import get_logger
+from utils import SafeHtml, render_template, load_template
+
+def test_templates() -> None:
+    """Test escaping, SafeHtml passthrough, template caching and reloading"""
+    logger = get_logger()
+    logger.info("🧪 Testing templates...")
+
+    templates_dir, reload = utils.TEMPLATES_DIR, utils.TEMPLATE_RELOAD
+    with tempfile.TemporaryDirectory() as directory:
+        utils.TEMPLATES_DIR = directory
+        path = os.path.join(directory, "test_page.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("<h1>{{title}}</h1><div>{{body}}</div>")
+
+        try:
+            # Test 1: Plain strings are escaped, SafeHtml is left alone
+            logger.info("🛡️ Test 1: Autoescaping...")
+            html = render_template("test_page.html", autoescape=True, title='<script>alert("x")</script>', body=SafeHtml("<p>Trusted</p>"))
+            assert html == "<h1>&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt;</h1><div><p>Trusted</p></div>"
+            assert render_template("test_page.html", title="<b>", body="<i>") == "<h1><b></h1><div><i></div>"
+
+            # Test 2: Repeated renders reuse the compiled template instead of reading the file again
+            logger.info("📦 Test 2: Caching...")
+            utils.TEMPLATE_RELOAD = False
+            compiled = load_template("test_page.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<h2>{{title}}</h2>")
+            assert load_template("test_page.html") is compiled
+            assert render_template("test_page.html", title="News", body="") == "<h1>News</h1><div></div>"
+
+            # Test 3: With reloading on, every render picks up changes on disk
+            logger.info("🔄 Test 3: Reloading...")
+            utils.TEMPLATE_RELOAD = True
+            assert render_template("test_page.html", title="News") == "<h2>News</h2>"
+            assert load_template("test_page.html") is not load_template("test_page.html")
+        finally:
+            utils.TEMPLATES_DIR, utils.TEMPLATE_RELOAD = templates_dir, reload
+            utils._template_cache.pop("test_page.html", None)
+
+    # Test 4: NEWSBOT_TEMPLATE_RELOAD turns reloading on
+    logger.info("⚙️ Test 4: Environment variable...")
+    for value, expected in (("true", "True"), ("false", "False")):
+        result = subprocess.run(
+            [sys.executable, "-c", "import utils; print(utils.TEMPLATE_RELOAD)"],
+            env={**os.environ, "NEWSBOT_TEMPLATE_RELOAD": value}, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip().splitlines()[-1] == expected
+
+    logger.info("✅ Template tests completed!")
+
+if __name__ == "__main__":
+    test_templates()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the exact and approximate (IVF) vector indexes
+Runs offline, no API keys needed
+"""
+
+import numpy as np
+import preference_matrix
+from logger import get_logger
+from preference_matrix import PreferenceMatrix
+from vector_index import BruteForceIndex, IVFIndex, normalize
+
+def clustered_vectors(rng: np.random.Generator, count: int, dimensions: int, clusters: int) -> np.ndarray:
+    """Unit vectors scattered around a few random topics, like keyword embeddings"""
+    centers = rng.standard_normal((clusters, dimensions))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.standard_normal((count, dimensions))
+    return normalize(vectors)
+
+def exact_index(keys, vectors: np.ndarray) -> BruteForceIndex:
+    index = BruteForceIndex(vectors.shape[1])
+    index.add_many(keys, vectors)
+    return index
+
+def test_vector_index() -> None:
+    """Test top-k and threshold queries, incremental insert/delete and IVF recall"""
+    logger = get_logger()
+    logger.info("🧪 Testing vector indexes...")
+
+    rng = np.random.default_rng(3)
+    vectors = clustered_vectors(rng, 2000, 32, 20)
+    keys = [f"keyword-{i}" for i in range(len(vectors))]
+    query = vectors[0] + 0.05 * rng.standard_normal(32)
+    expected = vectors @ normalize(query)
+
+    # Test 1: Brute force matches a full scan
+    logger.info("🎯 Test 1: Exact search...")
+    exact = BruteForceIndex(32)
+    exact.add_many(keys, vectors)
+    top = exact.search(query, 5)
+    assert [key for key, _ in top] == [keys[i] for i in np.argsort(-expected)[:5]]
+    assert np.isclose(top[0][1], expected.max(), atol=1e-5)
+    assert {key for key, _ in exact.search_threshold(query, 0.5)} == {keys[i] for i in np.flatnonzero(expected > 0.5)}
+
+    # Test 2: Incremental insert, replace and delete
+    logger.info("✏️ Test 2: Incremental updates...")
+    exact.remove(top[0][0])
+    assert top[0][0] not in exact and len(exact) == 1999
+    assert exact.search(query, 1)[0][0] == top[1][0]
+
+    exact.add("new", query)
+    assert exact.search(query, 1)[0][0] == "new"
+    exact.add("new", -np.asarray(query))
+    assert len(exact) == 2000 and exact.search(query, 1)[0][0] == top[1][0]
+
+    # Test 3: IVF is exact when every bucket is probed, and keeps high recall when few are
+    logger.info("📦 Test 3: IVF search...")
+    ivf = IVFIndex(32, nlist=20, nprobe=20)
+    ivf.add_many(keys, vectors)
+    ivf.train()
+    assert ivf.is_trained
+    assert [key for key, _ in ivf.search(query, 10)] == [key for key, _ in exact_index(keys, vectors).search(query, 10)]
+
+    ivf.nprobe = 3
+    recalled = 0
+    for i in rng.choice(len(vectors), 50, replace=False):
+        truth = set(keys[j] for j in np.argsort(-(vectors @ vectors[i]))[:10])
+        recalled += len(truth & {key for key, _ in ivf.search(vectors[i], 10)})
+    assert recalled / 500 > 0.9, f"IVF recall too low: {recalled / 500:.2f}"
+
+    ivf.remove(keys[0])
+    ivf.add("new", query)
+    assert keys[0] not in ivf and len(ivf) == 2000
+    assert ivf.search(query, 1)[0][0] == "new"
+
+    # Test 4: PreferenceMatrix uses the configured index on large preference sets and keeps it in sync
+    logger.info("🧮 Test 4: Preference matrix search...")
+    small = PreferenceMatrix.from_arrays(keys[:100], vectors[:100], np.ones(100))
+    assert small.search(query, 3) == exact_index(keys[:100], vectors[:100]).search(query, 3)
+
+    backend, min_size = preference_matrix.VECTOR_INDEX_BACKEND, preference_matrix.VECTOR_INDEX_MIN_SIZE
+    try:
+        for name, index_type in (("ivf", IVFIndex), ("exact", BruteForceIndex)):
+            preference_matrix.configure_vector_index(name, 1000)
+            large = PreferenceMatrix.from_arrays(keys, vectors, np.ones(len(keys)))
+            assert large.search_threshold(vectors[5], 0.99)[0][0] == keys[5]
+            assert isinstance(large._vector_index, index_type)
+
+            large.remove([keys[5]])
+            large.add("replacement", 1, vectors[5])
+            assert large.copy().search(vectors[5], 1)[0][0] == "replacement"
+
+        try:
+            preference_matrix.configure_vector_index("hnsw", 1000)
+            assert False, "An unknown index backend should be rejected"
+        except ValueError:
+            pass
+    finally:
+        preference_matrix.configure_vector_index(backend, min_size)
+
+    logger.info("✅ Vector index tests completed!")
+
+if __name__ == "__main__":
+    test_vector_index()
@@ -1,21 +1,84 @@
 import os
-from typing import Any, Optional
+import re
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from _types import ExtractedArticleData
-from newspaper import Article, Config
+from newspaper import Article, Config, network
 from logger import get_logger
+from http_session import get_session, HTTP_RETRY_STATUSES
+from caches import ExtractionCache
 import time
 
-def render_template(template_name: str, **kwargs: Any) -> str:
-    template_path = os.path.join('templates', template_name)
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
+TEMPLATES_DIR = 'templates'
+TEMPLATE_PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+# Re-read templates from disk on every render (for development)
+TEMPLATE_RELOAD = os.getenv("NEWSBOT_TEMPLATE_RELOAD", "false").lower() == "true"
 
-    for key, value in kwargs.items():
-        template = template.replace(f'{{{{{key}}}}}', str(value))
+class SafeHtml(str):
+    """Marks a value as trusted HTML, so autoescaping leaves it untouched"""
+
+class CompiledTemplate:
+    """A template parsed once into literal and placeholder segments.
+
+    Rendering is a single join over the segments, instead of one full-string
+    replace pass per variable.
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        parts = TEMPLATE_PLACEHOLDER.split(source)
+        self.literals: List[str] = parts[0::2]
+        self.placeholders: List[str] = parts[1::2]
+
+    def render(self, values: Dict[str, Any], autoescape: bool = False) -> str:
+        segments = [self.literals[0]]
+        missing = []
+
+        for placeholder, literal in zip(self.placeholders, self.literals[1:]):
+            if placeholder in values:
+                value = values[placeholder]
+                if autoescape and not isinstance(value, SafeHtml):
+                    segments.append(html.escape(str(value), quote=True))
+                else:
+                    segments.append(str(value))
+            else:
+                missing.append(placeholder)
+                segments.append(f'{{{{{placeholder}}}}}')
+            segments.append(literal)
+
+        if missing:
+            get_logger().warning(f"⚠️  Undefined placeholders in template {self.name}: {sorted(set(missing))}")
+
+        return ''.join(segments)
+
+_template_cache: Dict[str, CompiledTemplate] = {}
+_template_lock = threading.Lock()
+
+def load_template(template_name: str, reload: Optional[bool] = None) -> CompiledTemplate:
+    template = _template_cache.get(template_name)
+    if template is None or (TEMPLATE_RELOAD if reload is None else reload):
+        template_path = os.path.join(TEMPLATES_DIR, template_name)
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template = CompiledTemplate(template_name, f.read())
+
+        with _template_lock:
+            _template_cache[template_name] = template
 
     return template
 
-def extract_article_content(url: str) -> Optional[ExtractedArticleData]:
+def preload_templates() -> None:
+    for template_name in os.listdir(TEMPLATES_DIR):
+        if template_name.endswith('.html'):
+            load_template(template_name, reload=True)
+
+def render_template(template_name: str, autoescape: bool = False, **kwargs: Any) -> str:
+    """Render a cached template. With autoescape, values are HTML-escaped unless wrapped in SafeHtml."""
+    return load_template(template_name).render(kwargs, autoescape)
+
+def extract_article_content(url: str, cache: Optional[ExtractionCache] = None) -> Optional[ExtractedArticleData]:
+    """Download and parse an article, reusing the cached extraction while it's fresh or unchanged"""
     # Different user agents to try if one fails
     user_agents = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -25,6 +88,11 @@ def extract_article_content(url: str) -> Optional[ExtractedArticleData]:
 
     logger = get_logger()
 
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cache.is_fresh(cached):
+        cache.record_fresh()
+        return cached.article
+
     for i, user_agent in enumerate(user_agents):
         try:
             # Configure newspaper with user agent
@@ -32,15 +100,25 @@ def extract_article_content(url: str) -> Optional[ExtractedArticleData]:
             config.browser_user_agent = user_agent
             config.request_timeout = 10
 
+            # Download through the shared session so connections are reused, then hand the html to newspaper
+            headers = {'User-Agent': user_agent, **(cached.conditional_headers() if cached is not None else {})}
+            response = get_session().get(url, headers=headers, timeout=config.request_timeout)
+
+            if cached is not None and response.status_code == 304:
+                cache.record_revalidated(url, cached)
+                return cached.article
+
+            response.raise_for_status()
+
             article = Article(url, config=config)
-            article.download()
+            article.download(input_html=network.get_html_2XX_only(url, config, response=response))
             article.parse()
 
             if not article.text:
                 logger.warning(f"⚠️  Article text is empty for URL: {url}")
                 return None
 
-            return {
+            article_data: ExtractedArticleData = {
                 'title': article.title or "Untitled",
                 'content': article.text,
                 'authors': article.authors,
@@ -49,8 +127,14 @@ def extract_article_content(url: str) -> Optional[ExtractedArticleData]:
                 'url': url
             }
 
+            if cache is not None:
+                cache.record_downloaded(url, article_data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return article_data
+
         except Exception as e:
-            if i < len(user_agents) - 1:
+            # The session already retried these, and another user agent won't get a busy server to answer
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            if i < len(user_agents) - 1 and status not in HTTP_RETRY_STATUSES:
                 logger.debug(f"🔄  Retry {i+1} failed for {url}: {str(e)}")
                 time.sleep(1)  # Brief delay before retry
                 continue
@@ -59,3 +143,35 @@ def extract_article_content(url: str) -> Optional[ExtractedArticleData]:
                 return None
 
     return None
+
+def extract_first_available_article(candidates: List[Dict], max_workers: int = 5, cache: Optional[ExtractionCache] = None) -> Optional[Tuple[Dict, ExtractedArticleData]]:
+    """Extract ranked candidates concurrently and return the best-ranked one that succeeds.
+
+    Returns the (candidate, extracted data) pair, or None if every candidate fails.
+    """
+    if not candidates:
+        return None
+
+    logger = get_logger()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(candidates))), thread_name_prefix="extract")
+
+    try:
+        futures = [executor.submit(extract_article_content, candidate['url'], cache) for candidate in candidates]
+
+        # Wait in rank order, so a lower-ranked article only wins if all better ones failed
+        for rank, (candidate, future) in enumerate(zip(candidates, futures), start=1):
+            article_data = future.result()
+            if article_data:
+                if rank > 1:
+                    logger.info(f"🔁  Fell back to #{rank} candidate: {candidate['title']}")
+                return candidate, article_data
+
+            logger.warning(f"⚠️  Could not extract #{rank} candidate: {candidate['url']}")
+
+        return None
+
+    finally:
+        # Don't wait for slower, lower-ranked downloads once we have a winner
+        executor.shutdown(wait=False, cancel_futures=True)
+        if cache is not None:
+            logger.info(f"📚  Extraction cache: {cache.stats()}")
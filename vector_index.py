@@ -0,0 +1,268 @@
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+Match = Tuple[Hashable, float]  # (key, cosine similarity)
+
+IVF_TRAINING_POINTS_PER_LIST = 16  # k-means sample size per inverted list
+IVF_TRAINING_ITERATIONS = 8
+IVF_DEFAULT_NPROBE = 4
+
+
+def normalize(vectors: Union[np.ndarray, Sequence]) -> np.ndarray:
+    """Scale vectors (or rows of a matrix) to unit length, leaving zero vectors as zero"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def above_threshold(scores: np.ndarray, threshold: float) -> np.ndarray:
+    """Positions of the scores strictly above threshold, best first"""
+    matches = np.flatnonzero(scores > threshold)
+    return matches[np.argsort(-scores[matches], kind="stable")]
+
+
+class _VectorList:
+    """Growable block of unit vectors with O(1) append and swap-remove by key"""
+
+    def __init__(self, dimensions: int, capacity: int = 16):
+        self.keys: List[Hashable] = []
+        self.positions: Dict[Hashable, int] = {}
+        self._buffer = np.zeros((max(1, capacity), dimensions), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buffer[:len(self.keys)]
+
+    def extend(self, keys: Sequence[Hashable], vectors: np.ndarray) -> None:
+        start, end = len(self.keys), len(self.keys) + len(keys)
+        if end > len(self._buffer):
+            grown = np.zeros((max(end, 2 * len(self._buffer)), self._buffer.shape[1]), dtype=np.float32)
+            grown[:start] = self._buffer[:start]
+            self._buffer = grown
+
+        self._buffer[start:end] = vectors
+        for offset, key in enumerate(keys):
+            self.positions[key] = start + offset
+        self.keys.extend(keys)
+
+    def discard(self, key: Hashable) -> None:
+        position = self.positions.pop(key)
+        last = len(self.keys) - 1
+
+        # Move the last vector into the hole, so the block stays contiguous
+        if position != last:
+            moved = self.keys[last]
+            self._buffer[position] = self._buffer[last]
+            self.keys[position] = moved
+            self.positions[moved] = position
+        self.keys.pop()
+
+    def copy(self) -> '_VectorList':
+        copy = _VectorList(self._buffer.shape[1], len(self.keys))
+        copy.extend(list(self.keys), self.vectors)
+        return copy
+
+
+class BruteForceIndex:
+    """Exact cosine-similarity index: every query scans every vector"""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self._vectors = _VectorList(dimensions)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._vectors.positions
+
+    def add(self, key: Hashable, vector: Sequence[float]) -> None:
+        """Insert a vector, replacing the one already stored under key"""
+        self.add_many([key], [vector])
+
+    def add_many(self, keys: Sequence[Hashable], vectors: Union[np.ndarray, Sequence]) -> None:
+        keys = list(keys)
+        for key in keys:
+            if key in self:
+                self.remove(key)
+        self._vectors.extend(keys, normalize(vectors).reshape(len(keys), self.dimensions))
+
+    def remove(self, key: Hashable) -> None:
+        if key in self:
+            self._vectors.discard(key)
+
+    def search(self, query: Sequence[float], k: int) -> List[Match]:
+        """The k most similar vectors, best first"""
+        scores = self._vectors.vectors @ normalize(query)
+        return [(self._vectors.keys[i], float(scores[i])) for i in top_k(scores, k)]
+
+    def search_threshold(self, query: Sequence[float], threshold: float) -> List[Match]:
+        """Every vector more similar than threshold, best first"""
+        scores = self._vectors.vectors @ normalize(query)
+        return [(self._vectors.keys[i], float(scores[i])) for i in above_threshold(scores, threshold)]
+
+    def copy(self) -> 'BruteForceIndex':
+        index = BruteForceIndex(self.dimensions)
+        index._vectors = self._vectors.copy()
+        return index
+
+
+class IVFIndex:
+    """Approximate cosine-similarity index using an inverted file (IVF).
+
+    Vectors are bucketed by their nearest k-means centroid, and a query only scans
+    the `nprobe` buckets whose centroids are closest to it, so a neighbour that
+    landed in an unprobed bucket can be missed. Until train() is called everything
+    sits in one bucket and queries are exact; after that, inserts and deletes only
+    touch the vector's own bucket.
+    """
+
+    def __init__(self, dimensions: int, nlist: Optional[int] = None, nprobe: int = IVF_DEFAULT_NPROBE, seed: int = 0):
+        self.dimensions = dimensions
+        self.nlist = nlist  # Defaults to 2 * sqrt(n) at training time
+        self.nprobe = nprobe
+        self.seed = seed
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[_VectorList] = [_VectorList(dimensions)]
+        self._list_of: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._list_of
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def list_count(self) -> int:
+        return len(self._lists)
+
+    def train(self, sample: Optional[np.ndarray] = None) -> None:
+        """Fit the centroids with spherical k-means and re-bucket every stored vector.
+
+        Trains on the stored vectors unless a sample is given. Calling it again after
+        the index has grown a lot rebalances the buckets.
+        """
+        keys = [key for vectors in self._lists for key in vectors.keys]
+        vectors = np.vstack([vectors.vectors for vectors in self._lists]) if keys else np.zeros((0, self.dimensions), dtype=np.float32)
+        sample = vectors if sample is None else normalize(sample)
+        if len(sample) == 0:
+            return
+
+        # Scanning is memory-bound, so prefer more, smaller lists over probing more of them
+        nlist = max(1, min(self.nlist or int(2 * np.sqrt(len(sample))), len(sample)))
+        self._centroids = self._kmeans(sample, nlist)
+
+        self._lists = [_VectorList(self.dimensions) for _ in range(nlist)]
+        self._list_of = {}
+        if keys:
+            self._insert(keys, vectors)
+
+    def add(self, key: Hashable, vector: Sequence[float]) -> None:
+        """Insert a vector, replacing the one already stored under key"""
+        self.add_many([key], [vector])
+
+    def add_many(self, keys: Sequence[Hashable], vectors: Union[np.ndarray, Sequence]) -> None:
+        keys = list(keys)
+        for key in keys:
+            self.remove(key)
+        self._insert(keys, normalize(vectors).reshape(len(keys), self.dimensions))
+
+    def remove(self, key: Hashable) -> None:
+        bucket = self._list_of.pop(key, None)
+        if bucket is not None:
+            self._lists[bucket].discard(key)
+
+    def search(self, query: Sequence[float], k: int) -> List[Match]:
+        """The (approximately) k most similar vectors, best first"""
+        keys, scores = self._probe(normalize(query))
+        return [(keys[i], float(scores[i])) for i in top_k(scores, k)]
+
+    def search_threshold(self, query: Sequence[float], threshold: float) -> List[Match]:
+        """Vectors more similar than threshold within the probed buckets, best first"""
+        keys, scores = self._probe(normalize(query))
+        return [(keys[i], float(scores[i])) for i in above_threshold(scores, threshold)]
+
+    def copy(self) -> 'IVFIndex':
+        index = IVFIndex(self.dimensions, self.nlist, self.nprobe, self.seed)
+        index._centroids = None if self._centroids is None else self._centroids.copy()
+        index._lists = [vectors.copy() for vectors in self._lists]
+        index._list_of = dict(self._list_of)
+        return index
+
+    def _insert(self, keys: List[Hashable], vectors: np.ndarray) -> None:
+        buckets = np.zeros(len(keys), dtype=np.int64)
+        if self._centroids is not None and len(keys):
+            buckets = np.argmax(vectors @ self._centroids.T, axis=1)
+
+        for bucket in np.unique(buckets):
+            members = np.flatnonzero(buckets == bucket)
+            member_keys = [keys[i] for i in members]
+            self._lists[bucket].extend(member_keys, vectors[members])
+            for key in member_keys:
+                self._list_of[key] = int(bucket)
+
+    def _probe(self, query: np.ndarray) -> Tuple[List[Hashable], np.ndarray]:
+        buckets: Sequence[int] = range(len(self._lists))
+        if self._centroids is not None and self.nprobe < len(self._lists):
+            buckets = top_k(self._centroids @ query, self.nprobe)
+
+        keys: List[Hashable] = []
+        scores = []
+        for bucket in buckets:
+            vectors = self._lists[bucket]
+            if len(vectors):
+                keys.extend(vectors.keys)
+                scores.append(vectors.vectors @ query)
+
+        return keys, (np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32))
+
+    def _kmeans(self, vectors: np.ndarray, nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), nlist * IVF_TRAINING_POINTS_PER_LIST)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(IVF_TRAINING_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+            # Sum each cluster's members in one pass; empty clusters keep their centroid
+            filled = counts > 0
+            centroids[filled] = normalize(np.add.reduceat(sample[order], starts[filled], axis=0))
+
+        return centroids
+
+
+VectorIndex = Union[BruteForceIndex, IVFIndex]
+
+VECTOR_INDEXES = {"exact": BruteForceIndex, "ivf": IVFIndex}
+
+
+def build_index(backend: str, keys: Sequence[Hashable], vectors: Union[np.ndarray, Sequence]) -> VectorIndex:
+    """An index of the given backend holding `vectors` under `keys`, trained when approximate"""
+    index = VECTOR_INDEXES[backend](np.asarray(vectors).shape[1])
+    index.add_many(keys, vectors)
+    if isinstance(index, IVFIndex):
+        index.train()
+    return index